@@ -0,0 +1,301 @@
+import threading
+from array import array
+from core.config import (
+    ASSOCIATION_WALK_CACHE,
+    ASSOCIATION_REBUILD_MIN,
+    ASSOCIATION_REBUILD_FRACTION
+)
+
+class AssociationGraph:
+    """
+    Ассоциации мозга «стимул → ответ», скомпилированные в граф над
+    числовыми id слов.
+
+    Отдельного словаря «слово → id» у графа нет: id стимула хранится
+    прямо в его записи памяти мозга (entry["id"]), так что строки не
+    хэшируются второй раз и не дублируются. Свой словарь loose_ids есть
+    только у слов, которые пока встречались лишь как ответы; когда такое
+    слово становится стимулом, его id переезжает в запись. Словарь памяти
+    граф не хранит — мозг передаёт его в вызовы.
+
+    Поле "id" попадает и в brain.db, но действительно только в процессе,
+    который его выдал: build_from() раздаёт id заново, а id в записи
+    принимается, только если words[id] — это её же стимул.
+
+    Основная часть — CSR в массивах NumPy: соседи вершины v лежат в
+    indices[indptr[v]:indptr[v + 1]]. У Brain на стимул один ответ, так
+    что в строке не больше одного соседа, но формат этого не требует.
+    Новые связи из link() копятся в небольшом словаре поверх CSR и
+    вливаются в него пересборкой, когда их становится много.
+
+    Обходы на k шагов кэшируются. Изменение связи сбрасывает кэш, только
+    если изменившаяся вершина встречалась в закэшированных обходах.
+    Циклы видны структурно: обход останавливается перед повторной вершиной
+    (петля «ответ == стимул» даёт пустой обход), а cycle_members() отмечает
+    все вершины, лежащие на циклах.
+    """
+
+    def __init__(
+            self,
+            cache_size=ASSOCIATION_WALK_CACHE,
+            rebuild_min=ASSOCIATION_REBUILD_MIN,
+            rebuild_fraction=ASSOCIATION_REBUILD_FRACTION,
+        ):
+        self.cache_size = cache_size
+        self.rebuild_min = rebuild_min
+        self.rebuild_fraction = rebuild_fraction
+
+        self.words = []  # id → слово (те же объекты строк, что и ключи памяти)
+        self.loose_ids = {}  # слова, встречавшиеся только как ответы → id
+        self.indptr = None
+        self.indices = None
+        self.edges = 0
+        self._first = array("q")  # первый сосед каждой скомпилированной вершины: быстрый шаг обхода
+        self._delta = {}  # id стимула → id ответа, ещё не влитые в CSR
+        self._walks = {}
+        self._walk_nodes = set()  # вершины, встречающиеся в закэшированных обходах
+        self._cycles = None
+        self._late = []  # (стимул, запись), пришедшие из link() во время сборки
+        self._lock = threading.Lock()
+
+        # False, пока граф собирается из загруженного мозга (build_from)
+        self.complete = True
+        self.rebuilds = 0
+
+    def _new_id(self, word):
+        self.words.append(word)
+        return len(self.words) - 1
+
+    def _own_id(self, word, entry):
+        """
+        id из записи, только если его выдал этот граф этому слову: записи
+        из brain.db несут id прошлого процесса, им доверять нельзя.
+        """
+        word_id = entry.get("id")
+        if isinstance(word_id, int) and 0 <= word_id < len(self.words) and self.words[word_id] == word:
+            return word_id
+        return None
+
+    def _word_id(self, word, memory):
+        """id слова или None, если графу оно не встречалось."""
+        entry = memory.get(word)
+        if isinstance(entry, dict):
+            word_id = self._own_id(word, entry)
+            if word_id is not None:
+                return word_id
+        return self.loose_ids.get(word)
+
+    def _stimulus_id(self, stimulus, entry):
+        word_id = self._own_id(stimulus, entry)
+        if word_id is None:
+            word_id = self.loose_ids.pop(stimulus, None)
+            if word_id is None:
+                word_id = self._new_id(stimulus)
+            entry["id"] = word_id
+        return word_id
+
+    def _response_id(self, response, memory):
+        word_id = self._word_id(response, memory)
+        if word_id is None:
+            word_id = self._new_id(response)
+            self.loose_ids[response] = word_id
+        return word_id
+
+    def _neighbor(self, word_id):
+        target = self._delta.get(word_id)
+        if target is not None:
+            return target
+        if word_id < len(self._first):
+            return self._first[word_id]
+        return -1
+
+    def _invalidate(self):
+        self._walks.clear()
+        self._walk_nodes.clear()
+        self._cycles = None
+
+    def link(self, stimulus, entry, memory):
+        """
+        Связь из записи памяти мозга: entry — memory[stimulus], её текущий
+        entry["response"]. Во время сборки связь откладывается до её конца.
+        """
+        with self._lock:
+            if not self.complete:
+                self._late.append((stimulus, entry))
+                return
+            self._link(stimulus, entry, memory)
+
+    def _link(self, stimulus, entry, memory):
+        response = entry.get("response")
+        if not isinstance(stimulus, str) or not isinstance(response, str):
+            return
+        source = self._stimulus_id(stimulus, entry)
+        target = self._response_id(response, memory)
+        if self._neighbor(source) == target:
+            return
+        self._delta[source] = target
+        self._cycles = None
+        # Обход зависит только от соседей пройденных вершин
+        if source in self._walk_nodes:
+            self._walks.clear()
+            self._walk_nodes.clear()
+        if len(self._delta) >= max(self.rebuild_min, self.rebuild_fraction * self.edges):
+            self._rebuild()
+
+    def _next_array(self):
+        """Следующая вершина для каждой вершины (-1 — нет связи): CSR плюс ещё не влитые связи."""
+        import numpy as np
+
+        nxt = np.full(len(self.words), -1, dtype=np.int64)
+        if self.indptr is not None:
+            compiled = len(self.indptr) - 1
+            has = self.indptr[1:] > self.indptr[:-1]
+            nxt[:compiled][has] = self.indices[self.indptr[:-1][has]]
+        if self._delta:
+            count = len(self._delta)
+            nxt[np.fromiter(self._delta.keys(), dtype=np.int64, count=count)] = \
+                np.fromiter(self._delta.values(), dtype=np.int64, count=count)
+        return nxt
+
+    def _compile(self, nxt):
+        import numpy as np
+
+        has = nxt >= 0
+        self.indptr = np.concatenate(([0], np.cumsum(has))).astype(np.int64)
+        self.indices = nxt[has].astype(np.int32)
+        self.edges = int(self.indptr[-1])
+        # Скаляр из array быстрее, чем из NumPy: обход делает по одному шагу за раз
+        self._first = array("q")
+        self._first.frombytes(nxt.astype(np.int64).tobytes())
+        self._delta = {}
+        self.rebuilds += 1
+
+    def _rebuild(self):
+        self._compile(self._next_array())
+
+    def build_from(self, memory):
+        """
+        Полная сборка из словаря мозга: записи стимулов получают новые id
+        (старые, например из brain.db, перезаписываются). Связи, пришедшие
+        из link() во время сборки, ложатся поверх.
+        """
+        import numpy as np
+
+        with self._lock:
+            self.complete = False
+        items = [
+            (stimulus, entry) for stimulus, entry in list(memory.items())
+            if isinstance(stimulus, str) and isinstance(entry, dict)
+        ]
+        words = [stimulus for stimulus, _ in items]
+        for word_id, (_, entry) in enumerate(items):
+            entry["id"] = word_id
+
+        loose_ids = {}
+        sources, targets = array("q"), array("q")
+        for source, (_, entry) in enumerate(items):
+            response = entry.get("response")
+            if not isinstance(response, str):
+                continue
+            target = memory.get(response)
+            target = target.get("id") if isinstance(target, dict) else None
+            if not isinstance(target, int) or not 0 <= target < len(words) or words[target] != response:
+                target = None  # запись появилась после снимка items, её id ещё не выдан
+            if target is None:
+                target = loose_ids.get(response)
+                if target is None:
+                    target = loose_ids[response] = len(words)
+                    words.append(response)
+            sources.append(source)
+            targets.append(target)
+
+        nxt = np.full(len(words), -1, dtype=np.int64)
+        nxt[np.frombuffer(sources, dtype=np.int64)] = np.frombuffer(targets, dtype=np.int64)
+
+        with self._lock:
+            self.words, self.loose_ids = words, loose_ids
+            self._compile(nxt)
+            late, self._late = self._late, []
+            for stimulus, entry in late:
+                self._link(stimulus, entry, memory)
+            self._invalidate()
+            self.complete = True
+
+    def walk(self, word, hops, memory):
+        """
+        До hops слов по цепочке ассоциаций от word (сам word не входит).
+        Обход обрывается на слове без связи и перед повторной вершиной.
+        """
+        with self._lock:
+            start = self._word_id(word, memory)
+            if start is None:
+                return []
+            key = (start, hops)
+            cached = self._walks.get(key)
+            if cached is not None:
+                return list(cached)
+
+            path = []
+            seen = {start}
+            current = start
+            for _ in range(hops):
+                current = self._neighbor(current)
+                if current < 0 or current in seen:
+                    break
+                seen.add(current)
+                path.append(self.words[current])
+
+            if len(self._walks) >= self.cache_size:
+                # Вытесняется самый старый обход (словарь хранит порядок вставки)
+                del self._walks[next(iter(self._walks))]
+                # Вершины вытесненных обходов не вычитаются: набор лишь растёт,
+                # пока очередное изменение или его размер не сбросят кэш целиком
+                if len(self._walk_nodes) > 4 * self.cache_size:
+                    self._walks.clear()
+                    self._walk_nodes.clear()
+            self._walks[key] = tuple(path)
+            self._walk_nodes.update(seen)
+            return path
+
+    def reachable(self, source, target, hops, memory):
+        """Достижим ли target из source не больше чем за hops шагов."""
+        return target in self.walk(source, hops, memory)
+    def cycle_members(self):
+        """
+        Булев массив по id слов: лежит ли слово на цикле ассоциаций.
+        Удвоением указателей: после 2^m >= n шагов любая вершина
+        оказывается на цикле, и образ этого отображения — ровно циклы.
+        """
+        import numpy as np
+
+        with self._lock:
+            if self._cycles is not None:
+                return self._cycles
+            n = len(self.words)
+            # Вершины без связи ведут в служебную вершину n с петлёй
+            jump = self._next_array()
+            jump[jump < 0] = n
+            jump = np.append(jump, n)
+            steps = 1
+            while steps < n + 1:
+                jump = jump[jump]
+                steps *= 2
+            members = np.zeros(n + 1, dtype=bool)
+            members[jump] = True
+            self._cycles = members[:n]
+            return self._cycles
+
+    def on_cycle(self, word, memory):
+        word_id = self._word_id(word, memory)
+        return word_id is not None and bool(self.cycle_members()[word_id])
+
+    def stats(self):
+        return {
+            "words": len(self.words),
+            "loose_words": len(self.loose_ids),
+            "edges": self.edges,
+            "pending": len(self._delta),
+            "cached_walks": len(self._walks),
+            "rebuilds": self.rebuilds,
+            "complete": self.complete,
+        }
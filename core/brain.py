@@ -3,16 +3,22 @@ import os
 import pickle
 import time
 import sys
-import psutil
+import threading
 from core.config import (
     BRAIN_SAVE_PATH,
     BRAIN_MAX_RAM_MB,
     BRAIN_MAX_RAM_PERCENT,
     BRAIN_AUTO_SAVE_INTERVAL,
+    BRAIN_BACKGROUND_LOAD,
+    BRAIN_LOOKUP_WHILE_LOADING,
+    SIMILARITY_ENABLED,
+    ASSOCIATION_ENABLED,
     TICKS_PER_SECOND
 )
 from core.config import FALLBACK_EMOTIONS
 from core.logger import trace_method
+from core.similarity import SimilarityIndex
+from core.association import AssociationGraph
 
 class Brain:
     def __init__(
@@ -21,6 +27,8 @@ class Brain:
             max_ram_mb=BRAIN_MAX_RAM_MB,
             max_ram_percent=BRAIN_MAX_RAM_PERCENT,
             auto_save_interval=BRAIN_AUTO_SAVE_INTERVAL,
+            background_load=BRAIN_BACKGROUND_LOAD,
+            lookup_while_loading=BRAIN_LOOKUP_WHILE_LOADING,
         ):
         self.memory = {}
         self.save_path = save_path
@@ -28,32 +36,147 @@ class Brain:
         self.max_ram_percent = max_ram_percent
         self.auto_save_interval = auto_save_interval
         self.last_save_time = time.time()
+        self.lookup_while_loading = lookup_while_loading
 
-        if os.path.exists(self.save_path):
+        # Пока мозг грузится в фоне, новые знания копятся в _pending.
+        # После загрузки из них добавляются только неизвестные стимулы:
+        # ответ, выученный до загрузки, часто сам был запасной эмоцией
+        # (predict_response не видел настоящих знаний) и не должен их затирать
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._pending = {}
+        self.load_seconds = None
+        self.load_error = None
+
+        # Индекс похожих стимулов для неизвестных вводов; после загрузки
+        # строится в отдельном потоке, а дальше пополняется в learn()
+        self.similar = SimilarityIndex() if SIMILARITY_ENABLED else None
+        # Те же связи в виде графа над id слов — для многошаговых откликов (walk)
+        self.graph = AssociationGraph() if ASSOCIATION_ENABLED else None
+
+        if not os.path.exists(self.save_path):
+            self._ready.set()
+        elif background_load:
+            threading.Thread(target=self._load_in_background, name="brain-loader", daemon=True).start()
+        else:
             self.load()
 
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout=None):
+        return self._ready.wait(timeout)
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        except Exception as e:
+            # Повреждённый brain.db не должен ронять существо: продолжаем с пустой памятью,
+            # но не перезаписываем файл, пока ошибка не разобрана
+            self.load_error = e
+            print(f"⚠️ Не удалось загрузить мозг из {self.save_path}: {e}")
+            with self._load_lock:
+                self.memory = self._pending
+                self._pending = {}
+                self._ready.set()
+            self._start_graph_build()
+
     @trace_method("Brain")
     def learn(self, stimulus, response, outcome=None):
-        self.memory[stimulus] = {"response": response}
+        if not self._ready.is_set():
+            with self._load_lock:
+                if not self._ready.is_set():
+                    self._pending[stimulus] = {"response": response}
+                    return
+        self._remember(stimulus, response)
+        self._maybe_save()
+
+    def learn_many(self, pairs):
+        """Пакетное обучение: одна проверка автосохранения на весь пакет."""
+        self._ready.wait()
+        for stimulus, response in pairs:
+            self._remember(stimulus, response)
         self._maybe_save()
 
+    def _remember(self, stimulus, response):
+        entry = self.memory.get(stimulus)
+        if entry is None:
+            entry = self.memory[stimulus] = {"response": response}
+            if self.similar is not None:
+                self.similar.add(stimulus)
+        else:
+            # Запись меняется на месте: в ней же лежит id слова в графе ассоциаций
+            entry["response"] = response
+        if self.graph is not None:
+            self.graph.link(stimulus, entry, self.memory)
+
     @trace_method("Brain")
     def predict_response(self, stimulus):
-        if stimulus in self.memory:
-            response = self.memory[stimulus]["response"]
+        if not self._ready.is_set():
+            if self.lookup_while_loading == "block":
+                self._ready.wait()
+            else:
+                return self._predict_from(self._pending, stimulus)
+        return self._predict_from(self.memory, stimulus)
+
+    def _predict_from(self, memory, stimulus):
+        if stimulus in memory:
+            response = memory[stimulus]["response"]
             if response == stimulus:
                 return random.choice(FALLBACK_EMOTIONS)
             return response
-        return random.choice(FALLBACK_EMOTIONS)
+
+        response = self._nearest_from(memory, stimulus)
+        return response if response is not None else random.choice(FALLBACK_EMOTIONS)
+
+    def nearest_response(self, stimulus):
+        """Ответ самого похожего известного стимула или None (для неизвестных вводов)."""
+        return self._nearest_from(self.memory if self._ready.is_set() else self._pending, stimulus)
+
+    def _nearest_from(self, memory, stimulus):
+        nearest = self.similar.nearest(stimulus) if self.similar is not None else None
+        if nearest is not None and nearest in memory:
+            response = memory[nearest]["response"]
+            if response not in (stimulus, nearest):
+                return response
+        return None
+
+    def walk(self, stimulus, hops):
+        """
+        Цепочка ассоциаций от stimulus: до hops слов, без повторов.
+        Пока граф не собран, идёт по словарю памяти.
+        """
+        if self.graph is not None and self.graph.complete and self._ready.is_set():
+            return self.graph.walk(stimulus, hops, self.memory)
+        memory = self.memory if self._ready.is_set() else self._pending
+        path = []
+        seen = {stimulus}
+        current = stimulus
+        for _ in range(hops):
+            entry = memory.get(current)
+            if entry is None:
+                break
+            current = entry["response"]
+            if current in seen:
+                break
+            seen.add(current)
+            path.append(current)
+        return path
+
+    def _build_similarity_index(self):
+        # list() снимает ключи атомарно: learn() в потоке тиков может добавлять новые
+        for stimulus in list(self.memory.keys()):
+            self.similar.add(stimulus)
 
     def _buffer_size_bytes(self):
         return sys.getsizeof(self.memory)
 
     def _memory_usage_percent(self):
+        import psutil  # Импорт при первом использовании: ускоряет запуск
         return psutil.virtual_memory().percent
 
     def _check_system_memory(self):
-        system_memory_usage = psutil.virtual_memory().percent
+        system_memory_usage = self._memory_usage_percent()
         if system_memory_usage >= 90:
             self.save()
 
@@ -74,6 +197,16 @@ class Brain:
             self.last_save_time = now
 
     def save(self):
+        """
+        brain.db — pickle словаря «стимул → запись». В записи обязателен
+        "response"; если включён граф ассоциаций, в ней есть и "id" —
+        номер слова в графе этого процесса. Он не часть знаний: при
+        загрузке выдаётся заново, а brain.db без него читаются как прежде.
+        """
+        if self.load_error is not None:
+            return
+        # Сохранение до окончания загрузки перезаписало бы brain.db неполной памятью
+        self._ready.wait()
         os.makedirs(os.path.dirname(self.save_path), exist_ok=True)
         with open(self.save_path, "wb") as f:
             pickle.dump(self.memory, f)
@@ -83,5 +216,25 @@ class Brain:
         self.last_save_time = time.time()
 
     def load(self):
+        started = time.perf_counter()
         with open(self.save_path, "rb") as f:
-            self.memory = pickle.load(f)
+            loaded = pickle.load(f)
+        if self.graph is not None:
+            # До конца сборки графа walk() идёт по словарю
+            self.graph.complete = False
+        with self._load_lock:
+            for stimulus, entry in self._pending.items():
+                loaded.setdefault(stimulus, entry)
+            self.memory = loaded
+            self._pending = {}
+            self._ready.set()
+        self.load_seconds = time.perf_counter() - started
+
+        if self.similar is not None:
+            threading.Thread(target=self._build_similarity_index, name="brain-indexer", daemon=True).start()
+        self._start_graph_build()
+
+    def _start_graph_build(self):
+        if self.graph is not None:
+            self.graph.complete = False
+            threading.Thread(target=self.graph.build_from, args=(self.memory,), name="brain-graph", daemon=True).start()
@@ -0,0 +1,483 @@
+"""
+Общий мозг для нескольких процессов.
+
+Процесс-владелец (BrainServer) единственный держит Brain и единственный
+пишет brain.db. Снимок памяти публикуется в разделяемую память как
+хэш-таблица с открытой адресацией; клиенты (BrainClient) читают её
+напрямую, без обращения к владельцу. Обучение клиенты копят пакетами
+и отправляют владельцу по локальному соединению.
+
+Сегмент снимка:
+    заголовок  <8sQQQ>  magic, число слотов, число записей, смещение кучи
+    слоты      <QQII>   хэш (старший бит = занято), смещение в куче, длина ключа, длина ответа
+    куча       utf-8 ключ, сразу за ним utf-8 ответ
+
+Снимок состоит из базового сегмента и сегмента-дельты того же формата
+с записями, изменёнными после сборки базы; клиент ищет сначала в дельте.
+Обычная публикация кодирует только дельту, база пересобирается, когда
+дельта становится велика. Кодирование идёт вне блокировки, по копии.
+
+Управляющий сегмент <prefix>_ctl хранит поколение и имена базы и дельты
+(пустое имя — дельты нет). Поколение нечётное, пока владелец переписывает
+имена (seqlock).
+"""
+import os
+import sys
+import struct
+import random
+import hashlib
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client, AuthenticationError
+from core.brain import Brain
+from core.logger import trace_method
+from core.config import (
+    BRAIN_SERVICE_ADDRESS,
+    BRAIN_SERVICE_AUTHKEY_PATH,
+    BRAIN_SERVICE_SHM_PREFIX,
+    BRAIN_SERVICE_PUBLISH_INTERVAL,
+    BRAIN_SERVICE_DELTA_MIN,
+    BRAIN_SERVICE_DELTA_FRACTION,
+    BRAIN_CLIENT_BATCH_SIZE,
+    BRAIN_CLIENT_FLUSH_INTERVAL,
+    FALLBACK_EMOTIONS
+)
+
+SNAPSHOT_MAGIC = b"SOBBRAIN"
+SNAPSHOT_HEADER = struct.Struct("<8sQQQ")
+SLOT = struct.Struct("<QQII")
+CONTROL = struct.Struct("<Q64s64s")
+OCCUPIED = 1 << 63
+
+def _key_hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little") | OCCUPIED
+
+def _attach(name):
+    """Открывает чужой сегмент так, чтобы выход клиента его не удалял."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # До Python 3.13 resource_tracker удаляет сегмент при выходе любого
+        # подключившегося процесса — снимаем его с учёта вручную
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+def _listen_address(address):
+    """Путь к Unix-сокету; в Windows вместо него — именованный канал с тем же именем."""
+    if isinstance(address, str) and sys.platform == "win32":
+        return "\\\\.\\pipe\\" + os.path.basename(address)
+    return address
+
+def _write_private(path, data):
+    """Файл, доступный только владельцу (0600), записанный атомарно."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def read_authkey(path=BRAIN_SERVICE_AUTHKEY_PATH):
+    with open(path, "rb") as f:
+        return f.read()
+
+def encode_snapshot(memory):
+    """Собирает байтовый образ хэш-таблицы. Нестроковые ключи и ответы пропускаются."""
+    items = []
+    heap_size = 0
+    for stimulus, entry in memory.items():
+        response = entry.get("response") if isinstance(entry, dict) else None
+        if not isinstance(stimulus, str) or not isinstance(response, str):
+            continue
+        key = stimulus.encode("utf-8")
+        value = response.encode("utf-8")
+        items.append((_key_hash(key), key, value))
+        heap_size += len(key) + len(value)
+
+    nslots = 1
+    while nslots < max(2 * len(items), 8):
+        nslots <<= 1
+
+    heap_offset = SNAPSHOT_HEADER.size + nslots * SLOT.size
+    buf = bytearray(heap_offset + heap_size)
+    SNAPSHOT_HEADER.pack_into(buf, 0, SNAPSHOT_MAGIC, nslots, len(items), heap_offset)
+
+    mask = nslots - 1
+    pos = heap_offset
+    for h, key, value in items:
+        slot = h & mask
+        while struct.unpack_from("<Q", buf, SNAPSHOT_HEADER.size + slot * SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        SLOT.pack_into(buf, SNAPSHOT_HEADER.size + slot * SLOT.size, h, pos, len(key), len(value))
+        buf[pos:pos + len(key)] = key
+        buf[pos + len(key):pos + len(key) + len(value)] = value
+        pos += len(key) + len(value)
+    return buf
+
+def snapshot_lookup(buf, stimulus):
+    """Ответ на stimulus из снимка или None."""
+    magic, nslots, count, heap_offset = SNAPSHOT_HEADER.unpack_from(buf, 0)
+    key = stimulus.encode("utf-8")
+    h = _key_hash(key)
+    mask = nslots - 1
+    slot = h & mask
+    while True:
+        slot_hash, pos, key_len, value_len = SLOT.unpack_from(buf, SNAPSHOT_HEADER.size + slot * SLOT.size)
+        if not slot_hash:
+            return None
+        if slot_hash == h and key_len == len(key) and bytes(buf[pos:pos + key_len]) == key:
+            return bytes(buf[pos + key_len:pos + key_len + value_len]).decode("utf-8")
+        slot = (slot + 1) & mask
+
+class BrainServer:
+    def __init__(
+            self,
+            brain=None,
+            address=BRAIN_SERVICE_ADDRESS,
+            authkey_path=BRAIN_SERVICE_AUTHKEY_PATH,
+            prefix=BRAIN_SERVICE_SHM_PREFIX,
+            publish_interval=BRAIN_SERVICE_PUBLISH_INTERVAL,
+            delta_min=BRAIN_SERVICE_DELTA_MIN,
+            delta_fraction=BRAIN_SERVICE_DELTA_FRACTION,
+        ):
+        self.brain = brain or Brain(background_load=False)
+        self.address = _listen_address(address)
+        # Новый ключ на каждый запуск: прочитать его может только владелец файла
+        self.authkey = os.urandom(32)
+        self.authkey_path = authkey_path
+        _write_private(authkey_path, self.authkey)
+        self.prefix = prefix
+        self.publish_interval = publish_interval
+        self.delta_min = delta_min
+        self.delta_fraction = delta_fraction
+
+        self.generation = 0
+        # Поколение, в котором станут видны записи, принятые сейчас
+        self.next_visible = 2
+        self.dirty = True
+        self._lock = threading.Lock()          # мозг и список изменений
+        self._publish_lock = threading.Lock()  # одна публикация за раз
+        self._stop = threading.Event()
+        self._base = None
+        self._base_entries = 0
+        self._delta = None
+        # Изменения после сборки текущей базы: стимул → ответ
+        self._changes = {}
+        self.full_publishes = 0
+        self.delta_publishes = 0
+
+        self.control = shared_memory.SharedMemory(name=f"{prefix}_ctl", create=True, size=CONTROL.size)
+        self.publish()
+
+    def publish(self):
+        with self._publish_lock:
+            # Под блокировкой мозга — только копия изменений (или всей памяти для
+            # новой базы) и номер поколения. Записи, принятые после этого,
+            # обещаются следующему поколению и попадут в следующую публикацию
+            with self._lock:
+                full = self._base is None or len(self._changes) > max(
+                    self.delta_min, self.delta_fraction * self._base_entries
+                )
+                if full:
+                    source = dict(self.brain.memory)
+                    self._changes = {}
+                else:
+                    source = {stimulus: {"response": response} for stimulus, response in self._changes.items()}
+                self.dirty = False
+                generation = self.generation + 2
+                self.next_visible = generation + 2
+
+            data = encode_snapshot(source)
+            segment = shared_memory.SharedMemory(
+                name=f"{self.prefix}_{'b' if full else 'd'}{generation}", create=True, size=len(data)
+            )
+            segment.buf[:len(data)] = data
+
+            old = [self._delta]
+            if full:
+                old.append(self._base)
+                self._base, self._delta = segment, None
+                self._base_entries = len(source)
+                self.full_publishes += 1
+            else:
+                self._delta = segment
+                self.delta_publishes += 1
+
+            base_name = self._base.name.lstrip("/").encode("utf-8")
+            delta_name = self._delta.name.lstrip("/").encode("utf-8") if self._delta is not None else b""
+            struct.pack_into("<Q", self.control.buf, 0, generation - 1)
+            struct.pack_into("<64s64s", self.control.buf, 8, base_name, delta_name)
+            struct.pack_into("<Q", self.control.buf, 0, generation)
+            self.generation = generation
+
+            # Клиенты, уже открывшие старые сегменты, дочитают их: unlink убирает только имя
+            for shm in old:
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+
+    def _publish_loop(self):
+        while not self._stop.wait(self.publish_interval):
+            if self.dirty:
+                self.publish()
+
+    def _serve_connection(self, conn):
+        with conn:
+            while not self._stop.is_set():
+                try:
+                    command, payload = conn.recv()
+                except (EOFError, OSError):
+                    return
+
+                if command == "attach":
+                    conn.send((f"{self.prefix}_ctl", self.generation))
+                elif command == "learn":
+                    with self._lock:
+                        self.brain.learn_many(payload)
+                        for stimulus, response in payload:
+                            if isinstance(stimulus, str) and isinstance(response, str):
+                                self._changes[stimulus] = response
+                        self.dirty = True
+                        visible_at = self.next_visible
+                    conn.send(visible_at)
+                elif command == "nearest":
+                    with self._lock:
+                        response = self.brain.nearest_response(payload)
+                    conn.send(response)
+                elif command == "save":
+                    with self._lock:
+                        self.brain.force_save()
+                    conn.send(True)
+                elif command == "stats":
+                    conn.send({
+                        "generation": self.generation,
+                        "entries": len(self.brain.memory),
+                        "delta_entries": len(self._changes),
+                        "full_publishes": self.full_publishes,
+                        "delta_publishes": self.delta_publishes,
+                    })
+                else:
+                    conn.send(None)
+
+    def serve_forever(self):
+        threading.Thread(target=self._publish_loop, name="brain-publisher", daemon=True).start()
+        unix_socket = isinstance(self.address, str) and sys.platform != "win32"
+        if unix_socket:
+            directory = os.path.dirname(self.address)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Сокет, оставшийся после аварийного выхода, мешает слушать
+            if os.path.exists(self.address):
+                os.remove(self.address)
+            # Сокет создаётся сразу с правами 0600, без окна между созданием и chmod
+            old_umask = os.umask(0o177)
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            if unix_socket:
+                os.umask(old_umask)
+
+        with listener:
+            print(f"🧠 Мозг обслуживает процессы по адресу {self.address}")
+            try:
+                while not self._stop.is_set():
+                    try:
+                        conn = listener.accept()
+                    except AuthenticationError:
+                        # Чужой процесс без ключа не должен останавливать владельца
+                        print("⚠️ Отклонено подключение с неверным ключом")
+                        continue
+                    threading.Thread(target=self._serve_connection, args=(conn,), daemon=True).start()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                self.shutdown()
+
+    def shutdown(self):
+        self._stop.set()
+        with self._lock:
+            self.brain.force_save()
+        with self._publish_lock:
+            for shm in (self._base, self._delta, self.control):
+                if shm is not None:
+                    shm.close()
+                    shm.unlink()
+            self._base = self._delta = None
+        if os.path.exists(self.authkey_path):
+            os.remove(self.authkey_path)
+
+class BrainClient:
+    """
+    Замена Brain для рабочих процессов: тот же интерфейс learn/predict_response,
+    чтение из разделяемой памяти, запись пакетами во владельца.
+    """
+
+    def __init__(
+            self,
+            address=BRAIN_SERVICE_ADDRESS,
+            authkey_path=BRAIN_SERVICE_AUTHKEY_PATH,
+            batch_size=BRAIN_CLIENT_BATCH_SIZE,
+            flush_interval=BRAIN_CLIENT_FLUSH_INTERVAL,
+        ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.load_seconds = 0.0
+
+        self._conn = Client(_listen_address(address), authkey=read_authkey(authkey_path))
+        self._conn_lock = threading.Lock()
+        self._batch = []
+        self._batch_lock = threading.Lock()
+        # Свои записи, которых ещё нет в снимке: стимул → (ответ, поколение, где они появятся)
+        self._unpublished = {}
+
+        control_name, _ = self._request("attach")
+        self._control = _attach(control_name)
+        self._generation = 0
+        self._base = None
+        self._delta = None
+        self._refresh()
+
+        self._stop = threading.Event()
+        threading.Thread(target=self._flush_loop, name="brain-client-flush", daemon=True).start()
+
+    def _request(self, command, payload=None):
+        with self._conn_lock:
+            self._conn.send((command, payload))
+            return self._conn.recv()
+
+    def _read_control(self):
+        while True:
+            generation, base_name, delta_name = CONTROL.unpack_from(self._control.buf, 0)
+            if generation % 2:
+                continue
+            if CONTROL.unpack_from(self._control.buf, 0)[0] == generation:
+                return (
+                    generation,
+                    base_name.rstrip(b"\0").decode("utf-8"),
+                    delta_name.rstrip(b"\0").decode("utf-8"),
+                )
+
+    def _refresh(self):
+        generation, base_name, delta_name = self._read_control()
+        if generation == self._generation:
+            return
+        try:
+            # База меняется редко: переоткрывается, только если сменилось имя
+            base = self._base
+            if base is None or base.name.lstrip("/") != base_name:
+                base = _attach(base_name)
+            delta = _attach(delta_name) if delta_name else None
+        except FileNotFoundError:
+            # Владелец успел опубликовать следующий снимок — подхватим его в следующий раз
+            return
+        for old in (self._base, self._delta):
+            if old is not None and old is not base:
+                old.close()
+        self._base = base
+        self._delta = delta
+        self._generation = generation
+        # Под _batch_lock: flush() в своём потоке проставляет записям поколение,
+        # и без блокировки запись могла бы остаться в новом словаре с inf навсегда
+        with self._batch_lock:
+            self._unpublished = {
+                stimulus: entry for stimulus, entry in self._unpublished.items()
+                if entry[1] > generation
+            }
+
+    def is_ready(self):
+        return True
+
+    def wait_ready(self, timeout=None):
+        return True
+
+    @trace_method("BrainClient")
+    def learn(self, stimulus, response, outcome=None):
+        with self._batch_lock:
+            self._batch.append((stimulus, response))
+            self._unpublished[stimulus] = (response, float("inf"))
+            full = len(self._batch) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._batch_lock:
+            batch, self._batch = self._batch, []
+        if not batch:
+            return
+        visible_at = self._request("learn", batch)
+        with self._batch_lock:
+            for stimulus, response in batch:
+                entry = self._unpublished.get(stimulus)
+                if entry is not None and entry[0] == response:
+                    self._unpublished[stimulus] = (response, visible_at)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _lookup(self, stimulus):
+        entry = self._unpublished.get(stimulus)
+        if entry is not None:
+            return entry[0]
+        if not isinstance(stimulus, str):
+            return None
+        if self._delta is not None:
+            response = snapshot_lookup(self._delta.buf, stimulus)
+            if response is not None:
+                return response
+        return snapshot_lookup(self._base.buf, stimulus)
+
+    @trace_method("BrainClient")
+    def predict_response(self, stimulus):
+        self._refresh()
+        response = self._lookup(stimulus)
+        if response is None:
+            # Индекс похожих стимулов есть только у владельца: промах стоит одного запроса к нему
+            response = self._request("nearest", stimulus)
+        if response is None or response == stimulus:
+            return random.choice(FALLBACK_EMOTIONS)
+        return response
+
+    def walk(self, stimulus, hops):
+        """
+        Цепочка ассоциаций, как Brain.walk. Графа у клиента нет:
+        шаги идут поиском по снимку, каждый — O(1) без обращения к владельцу.
+        """
+        self._refresh()
+        path = []
+        seen = {stimulus}
+        current = stimulus
+        for _ in range(hops):
+            current = self._lookup(current)
+            if current is None or current in seen:
+                break
+            seen.add(current)
+            path.append(current)
+        return path
+
+    def save(self):
+        self.flush()
+        self._request("save")
+
+    force_save = save
+
+    def stats(self):
+        return self._request("stats")
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        self._conn.close()
+        for shm in (self._base, self._delta):
+            if shm is not None:
+                shm.close()
+        self._control.close()
+
+if __name__ == "__main__":
+    BrainServer().serve_forever()
@@ -1,25 +1,48 @@
 import random
 from core.logger import trace_method
+from core.clock import WORLD_CLOCK, DecayingValue
 from core.config import (
     CHAKRA_ENERGY_GAIN,
+    CHAKRA_ENERGY_DECAY,
     CHAKRA_SATURATION_GAIN,
+    CHAKRA_SATURATION_DECAY,
+    CHAKRA_SATURATION_LIMIT,
     DEFAULT_EMOTION,
     FALLBACK_EMOTIONS
 )
 
 class Chakra:
-    def __init__(self, name, receptivity=1.0):
+    def __init__(self, name, receptivity=1.0, clock=None):
         self.name = name
-        self.energy = 1.0
+        self.clock = clock or WORLD_CLOCK
         self.receptivity = receptivity
-        self.saturation = 0.0
+        # Энергия возвращается к 1.0, насыщение спадает к 0 — досчитываются при чтении
+        self._energy = DecayingValue(1.0, CHAKRA_ENERGY_DECAY, baseline=1.0, tick=self.clock.tick)
+        self._saturation = DecayingValue(0.0, CHAKRA_SATURATION_DECAY, baseline=0.0, tick=self.clock.tick)
+
+    @property
+    def energy(self):
+        return self._energy.get(self.clock.tick)
+
+    @energy.setter
+    def energy(self, value):
+        self._energy.set(value, self.clock.tick)
+
+    @property
+    def saturation(self):
+        return self._saturation.get(self.clock.tick)
+
+    @saturation.setter
+    def saturation(self, value):
+        self._saturation.set(value, self.clock.tick)
 
     @trace_method("Chakra")
     def receive(self, vibration):
         if vibration.chakra == self.name:
-            delta = vibration.intensity * self.receptivity
-            self.energy += delta * CHAKRA_ENERGY_GAIN
-            self.saturation += delta * CHAKRA_SATURATION_GAIN
+            now = self.clock.tick
+            delta = vibration.intensity_at(now) * self.receptivity
+            self._energy.add(delta * CHAKRA_ENERGY_GAIN, now)
+            self._saturation.add(delta * CHAKRA_SATURATION_GAIN, now, limit=CHAKRA_SATURATION_LIMIT)
             return delta
         return 0
 
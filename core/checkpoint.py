@@ -0,0 +1,364 @@
+"""
+Контрольная точка всего существа: тик, энергия и настроение, сводка эмоций,
+чакры, краткосрочная и долговременная память, вибрации, очереди ввода
+и последний сигнал. Мозг хранится отдельно (brain.db / служба мозга).
+
+Снимок <path> переписывается атомарно (временный файл + os.replace):
+    заголовок  <4sHII>  magic, версия формата, длина до сжатия, длина после сжатия
+    тело       zlib(секции снимка)
+
+Долговременная память растёт без ограничений, поэтому она не входит в снимок,
+а дописывается в <path>.lt блоками только из новых вибраций:
+    заголовок  <4sII>   magic, число вибраций, длина после сжатия
+    тело       zlib(колонки вибраций)
+
+Снимок помнит, сколько вибраций и байт .lt ему соответствует: блок,
+дописанный после последнего снимка (сбой между записями), при
+восстановлении отбрасывается.
+
+Вибрации хранятся колонками, как в trace_store: интенсивности, тики,
+частоты и словари строк. Тики затухания сохраняются относительно часов
+существа и при восстановлении переносятся на текущие часы, поэтому снимок
+можно поднять на другой машине с другим временем мира.
+"""
+import os
+import time
+import zlib
+import struct
+from array import array
+from itertools import chain
+from core import logger
+from core.vibration import Vibration
+from core.chakra import Chakra
+from core.trace_store import pack_strings, unpack_strings, pack_dictionary, unpack_dictionary
+from core.config import (
+    CHECKPOINT_PATH,
+    CHECKPOINT_EVERY_TICKS,
+    CHECKPOINT_COMPRESSION_LEVEL
+)
+
+FORMAT_VERSION = 1
+SNAPSHOT_MAGIC = b"SOBK"
+SNAPSHOT_HEADER = struct.Struct("<4sHII")
+LONG_TERM_MAGIC = b"SOBL"
+LONG_TERM_HEADER = struct.Struct("<4sII")
+
+# тик существа, тик часов, энергия, active, is_resonating, есть ли last_signal
+SCALARS = struct.Struct("<qqdBBB")
+# масштаб, доминирующая ячейка (-1 — нет), число событий, число ячеек, число снимков
+EMOTIONS = struct.Struct("<dqqII")
+# вибраций в долговременной памяти, длина .lt
+LONG_TERM_TAIL = struct.Struct("<QQ")
+COUNT = struct.Struct("<I")
+
+def _take(payload, pos, typecode, count):
+    values = array(typecode)
+    end = pos + count * values.itemsize
+    values.frombytes(payload[pos:end])
+    return values, end
+
+def pack_words(words):
+    return COUNT.pack(len(words)) + pack_strings(words)
+
+def unpack_words(payload, pos):
+    (count,) = COUNT.unpack_from(payload, pos)
+    return unpack_strings(payload, pos + COUNT.size, count)
+
+def pack_vibrations(vibrations):
+    return b"".join([
+        COUNT.pack(len(vibrations)),
+        array("d", (v.intensity for v in vibrations)).tobytes(),
+        array("q", (v.tick for v in vibrations)).tobytes(),
+        array("I", (len(v.frequencies) for v in vibrations)).tobytes(),
+        array("q", chain.from_iterable(v.frequencies for v in vibrations)).tobytes(),
+        pack_dictionary([v.emotion for v in vibrations]),
+        pack_dictionary([v.chakra for v in vibrations]),
+        pack_strings([v.word for v in vibrations]),
+        pack_dictionary([v.source for v in vibrations]),
+    ])
+
+def unpack_vibrations(payload, pos, tick_offset=0):
+    (count,) = COUNT.unpack_from(payload, pos)
+    pos += COUNT.size
+    intensities, pos = _take(payload, pos, "d", count)
+    ticks, pos = _take(payload, pos, "q", count)
+    lengths, pos = _take(payload, pos, "I", count)
+    frequencies, pos = _take(payload, pos, "q", sum(lengths))
+    emotions, pos = unpack_dictionary(payload, pos, count)
+    chakras, pos = unpack_dictionary(payload, pos, count)
+    words, pos = unpack_strings(payload, pos, count)
+    sources, pos = unpack_dictionary(payload, pos, count)
+
+    frequencies = frequencies.tolist()
+    vibrations = []
+    start = 0
+    for i in range(count):
+        end = start + lengths[i]
+        vibrations.append(Vibration(
+            frequencies=frequencies[start:end],
+            intensity=intensities[i],
+            emotion=emotions[i],
+            chakra=chakras[i],
+            word=words[i],
+            source=sources[i],
+            tick=ticks[i] + tick_offset
+        ))
+        start = end
+    return vibrations, pos
+
+class BeingCheckpoint:
+    """
+    Сохранение и восстановление VibrationalBeing.
+
+    on_tick() вызывается из потока тиков в конце update() и раз в
+    every_ticks активных тиков пишет снимок. save() можно вызвать и из
+    другого потока: он берёт being.tick_lock и ждёт конца текущего тика.
+    """
+
+    def __init__(
+            self,
+            being,
+            path=CHECKPOINT_PATH,
+            every_ticks=CHECKPOINT_EVERY_TICKS,
+            compression_level=CHECKPOINT_COMPRESSION_LEVEL,
+        ):
+        self.being = being
+        self.path = path
+        self.long_term_path = path + ".lt"
+        self.every_ticks = every_ticks
+        self.compression_level = compression_level
+
+        # Сколько вибраций долговременной памяти уже лежит в .lt и где он кончается;
+        # None — содержимое .lt неизвестно, при первом сохранении он переписывается
+        self._long_term_count = None
+        self._long_term_bytes = 0
+        self._last_save_tick = being.tick
+
+        self.saves = 0
+        self.last_save_seconds = None
+        self.last_save_bytes = None
+        self.restore_seconds = None
+
+    def on_tick(self, tick):
+        if self.every_ticks and tick - self._last_save_tick >= self.every_ticks:
+            self.save()
+
+    def save(self, with_brain=False):
+        """Пишет снимок; with_brain=True сначала сохраняет и мозг."""
+        started = time.perf_counter()
+        if with_brain:
+            self.being.brain.force_save()
+
+        with self.being.tick_lock:
+            self._append_long_term()
+            raw = self._encode_snapshot()
+            self._last_save_tick = self.being.tick
+
+        body = zlib.compress(raw, self.compression_level)
+        self._ensure_dir()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, FORMAT_VERSION, len(raw), len(body)))
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self.saves += 1
+        self.last_save_bytes = SNAPSHOT_HEADER.size + len(body)
+        self.last_save_seconds = time.perf_counter() - started
+
+    def _append_long_term(self):
+        long_term = self.being.memory.long_term
+        mode = "ab"
+        if self._long_term_count is None or len(long_term) < self._long_term_count:
+            mode = "wb"
+            self._long_term_count = 0
+            self._long_term_bytes = 0
+
+        fresh = long_term[self._long_term_count:]
+        if not fresh and mode == "ab":
+            return
+
+        body = zlib.compress(pack_vibrations(fresh), self.compression_level)
+        self._ensure_dir()
+        with open(self.long_term_path, mode) as f:
+            if fresh:
+                f.write(LONG_TERM_HEADER.pack(LONG_TERM_MAGIC, len(fresh), len(body)))
+                f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        self._long_term_count += len(fresh)
+        if fresh:
+            self._long_term_bytes += LONG_TERM_HEADER.size + len(body)
+
+    def _encode_snapshot(self):
+        being = self.being
+        state = being.state
+        emotions = state.emotions
+        chakras = [
+            chakra if isinstance(chakra, Chakra) else Chakra(name, clock=being.clock)
+            for name, chakra in being.chakras.items()
+        ]
+        sentences = being.sentence_queue.items()
+        snapshots = list(emotions.snapshots)
+
+        return b"".join([
+            SCALARS.pack(
+                being.tick, being.clock.tick, state.energy, state.active,
+                being.is_resonating, being.last_signal is not None,
+            ),
+            pack_words([state.mood, being.last_signal or ""]),
+
+            EMOTIONS.pack(
+                emotions.scale,
+                -1 if emotions.dominant is None else emotions.dominant,
+                emotions.events, len(emotions.values), len(snapshots),
+            ),
+            emotions.values.tobytes(),
+            array("q", (tick for tick, _ in snapshots)).tobytes(),
+            b"".join(vector.tobytes() for _, vector in snapshots),
+
+            pack_words([chakra.name for chakra in chakras]),
+            array("d", (chakra.energy for chakra in chakras)).tobytes(),
+            array("d", (chakra.saturation for chakra in chakras)).tobytes(),
+            array("d", (chakra.receptivity for chakra in chakras)).tobytes(),
+
+            pack_vibrations(being.vibrations),
+            pack_vibrations(list(being.memory.short_term)),
+
+            pack_words(being.input_queue.items()),
+            COUNT.pack(len(sentences)),
+            array("I", (len(words) for words in sentences)).tobytes(),
+            pack_words([word for words in sentences for word in words]),
+            pack_words(being.sentence_buffer),
+
+            LONG_TERM_TAIL.pack(self._long_term_count, self._long_term_bytes),
+        ])
+
+    def restore(self):
+        """
+        Поднимает существо из снимка. Вызывать до запуска потока тиков.
+        Возвращает False, если снимка нет.
+        """
+        if not os.path.exists(self.path):
+            return False
+
+        started = time.perf_counter()
+        with open(self.path, "rb") as f:
+            header = f.read(SNAPSHOT_HEADER.size)
+            magic, version, raw_size, body_size = SNAPSHOT_HEADER.unpack(header)
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{self.path}: не контрольная точка существа")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{self.path}: неизвестная версия формата {version}")
+            raw = zlib.decompress(f.read(body_size))
+        if len(raw) != raw_size:
+            raise ValueError(f"{self.path}: повреждённый снимок")
+
+        with self.being.tick_lock:
+            self._decode_snapshot(raw)
+        self.restore_seconds = time.perf_counter() - started
+        return True
+
+    def _decode_snapshot(self, raw):
+        being = self.being
+        state = being.state
+        emotions = state.emotions
+        payload = raw
+
+        tick, saved_clock, energy, active, resonating, has_signal = SCALARS.unpack_from(payload, 0)
+        pos = SCALARS.size
+        # Часы мира могли уйти вперёд (или начаться заново на другой машине):
+        # возраст вибраций сохраняется, абсолютный тик — нет
+        tick_offset = being.clock.tick - saved_clock
+        (mood, last_signal), pos = unpack_words(payload, pos)
+
+        scale, dominant, events, cells, snapshot_count = EMOTIONS.unpack_from(payload, pos)
+        pos += EMOTIONS.size
+        values, pos = _take(payload, pos, "d", cells)
+        snapshot_ticks, pos = _take(payload, pos, "q", snapshot_count)
+        vectors, pos = _take(payload, pos, "d", cells * snapshot_count)
+        # Набор эмоций в config.py мог измениться — тогда сводка начинается заново
+        if cells == len(emotions.values):
+            emotions.restore(
+                values, scale, None if dominant < 0 else dominant, events,
+                [(t, vectors[i * cells:(i + 1) * cells]) for i, t in enumerate(snapshot_ticks)],
+            )
+
+        names, pos = unpack_words(payload, pos)
+        chakra_energy, pos = _take(payload, pos, "d", len(names))
+        chakra_saturation, pos = _take(payload, pos, "d", len(names))
+        chakra_receptivity, pos = _take(payload, pos, "d", len(names))
+        being.chakras = {}
+        for i, name in enumerate(names):
+            chakra = Chakra(name, receptivity=chakra_receptivity[i], clock=being.clock)
+            chakra.energy = chakra_energy[i]
+            chakra.saturation = chakra_saturation[i]
+            being.chakras[name] = chakra
+
+        being.vibrations, pos = unpack_vibrations(payload, pos, tick_offset)
+        short_term, pos = unpack_vibrations(payload, pos, tick_offset)
+
+        input_words, pos = unpack_words(payload, pos)
+        (sentence_count,) = COUNT.unpack_from(payload, pos)
+        sentence_lengths, pos = _take(payload, pos + COUNT.size, "I", sentence_count)
+        sentence_words, pos = unpack_words(payload, pos)
+        sentence_buffer, pos = unpack_words(payload, pos)
+        long_term_count, long_term_bytes = LONG_TERM_TAIL.unpack_from(payload, pos)
+
+        being.tick = tick
+        being.is_resonating = bool(resonating)
+        being.last_signal = last_signal if has_signal else None
+        state.energy = energy
+        state.active = active
+        state.mood = mood
+
+        being.memory.short_term.clear()
+        being.memory.short_term.extend(short_term)
+        being.memory.long_term = self._read_long_term(long_term_count, long_term_bytes, tick_offset)
+
+        being.input_queue.clear()
+        being.input_queue.put_many(input_words, force=True)
+        being.sentence_queue.clear()
+        sentences = []
+        start = 0
+        for length in sentence_lengths:
+            sentences.append(sentence_words[start:start + length])
+            start += length
+        being.sentence_queue.put_many(sentences, force=True)
+        being.sentence_buffer = sentence_buffer
+
+        self._last_save_tick = tick
+        logger.resume_from_tick(tick)
+
+    def _read_long_term(self, count, size, tick_offset):
+        long_term = []
+        if size:
+            with open(self.long_term_path, "rb") as f:
+                data = memoryview(f.read(size))
+            pos = 0
+            while pos < size:
+                magic, block_count, body_size = LONG_TERM_HEADER.unpack_from(data, pos)
+                if magic != LONG_TERM_MAGIC:
+                    raise ValueError(f"{self.long_term_path}: повреждённый блок по смещению {pos}")
+                pos += LONG_TERM_HEADER.size
+                block = zlib.decompress(data[pos:pos + body_size])
+                pos += body_size
+                vibrations, _ = unpack_vibrations(block, 0, tick_offset)
+                long_term.extend(vibrations)
+        if len(long_term) != count:
+            raise ValueError(f"{self.long_term_path}: ожидалось {count} вибраций, прочитано {len(long_term)}")
+
+        # Хвост после последнего снимка отбрасывается, следующие блоки пишутся за ним
+        if os.path.exists(self.long_term_path) and os.path.getsize(self.long_term_path) > size:
+            with open(self.long_term_path, "r+b") as f:
+                f.truncate(size)
+        self._long_term_count = count
+        self._long_term_bytes = size
+        return long_term
+
+    def _ensure_dir(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
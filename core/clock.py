@@ -0,0 +1,47 @@
+class Clock:
+    """
+    Общие часы популяции существ. Их продвигает один управляющий цикл
+    (O(1) за тик), а всё, что затухает со временем, хранит значение и
+    тик последнего изменения и досчитывается в замкнутой форме при чтении.
+    Поэтому спящие существа не стоят ничего, пока к ним не обратятся.
+    """
+
+    def __init__(self, tick=0):
+        self.tick = tick
+
+    def advance(self, ticks=1):
+        self.tick += ticks
+        return self.tick
+
+WORLD_CLOCK = Clock()
+
+class DecayingValue:
+    """
+    Величина, которая каждый тик приближается к baseline на долю rate:
+        v(t) = baseline + (v0 - baseline) * (1 - rate) ** (t - t0)
+    """
+
+    __slots__ = ("value", "tick", "rate", "baseline")
+
+    def __init__(self, value, rate, baseline=0.0, tick=0):
+        self.value = value
+        self.tick = tick
+        self.rate = rate
+        self.baseline = baseline
+
+    def get(self, now):
+        elapsed = now - self.tick
+        if elapsed <= 0 or self.value == self.baseline:
+            return self.value
+        return self.baseline + (self.value - self.baseline) * (1.0 - self.rate) ** elapsed
+
+    def set(self, value, now):
+        self.value = value
+        self.tick = now
+
+    def add(self, delta, now, limit=None):
+        value = self.get(now) + delta
+        if limit is not None:
+            value = min(value, limit)
+        self.set(value, now)
+        return value
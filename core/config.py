@@ -44,6 +44,37 @@ BRAIN_MAX_RAM_PERCENT = 50  # 50% от объема, заданного в BRAIN
 # Значение определяет, как часто система будет сохранять данные (чем меньше интервал, тем чаще сохраняются данные).
 BRAIN_AUTO_SAVE_INTERVAL = 1000  # Автосохранение каждые 1000 тиков. Это примерно 1000/100 = 10 секунд, если TICKS_PER_SECOND = 100.
 
+# Загружать мозг в фоновом потоке, чтобы меню появлялось сразу, а не после чтения всего brain.db.
+BRAIN_BACKGROUND_LOAD = True
+
+# Что делать с запросом к мозгу, пока он ещё загружается:
+# "fallback" — отвечать запасной эмоцией (FALLBACK_EMOTIONS), не останавливая тики;
+# "block" — дождаться окончания загрузки на первом же запросе.
+BRAIN_LOOKUP_WHILE_LOADING = "fallback"
+
+# Общий мозг для нескольких процессов (core/brain_service.py).
+# Владелец запускается отдельно: python -m core.brain_service
+# При BRAIN_SERVICE_ENABLED = True существа подключаются к нему вместо загрузки своей копии brain.db.
+BRAIN_SERVICE_ENABLED = False
+# Сообщения соединения распаковываются pickle, поэтому подключиться может только владелец
+# файлов: Unix-сокет с правами 0600 (в Windows — именованный канал с тем же именем) и ключ,
+# который владелец генерирует при каждом запуске и кладёт в файл с правами 0600.
+# TCP-адрес вида ("127.0.0.1", 6010) возможен, но защищён только этим ключом.
+BRAIN_SERVICE_ADDRESS = "data/brain.sock"
+BRAIN_SERVICE_AUTHKEY_PATH = "data/brain_service.key"
+BRAIN_SERVICE_SHM_PREFIX = "sob_brain"  # Префикс имён сегментов разделяемой памяти
+BRAIN_SERVICE_PUBLISH_INTERVAL = 1.0  # Как часто (сек) владелец публикует новый снимок, если были изменения
+# Изменения публикуются маленьким сегментом-дельтой поверх базового снимка; базовый снимок
+# пересобирается целиком, только когда дельта превышает BRAIN_SERVICE_DELTA_MIN записей
+# и долю BRAIN_SERVICE_DELTA_FRACTION от базы.
+BRAIN_SERVICE_DELTA_MIN = 4096
+BRAIN_SERVICE_DELTA_FRACTION = 0.1
+
+# Клиент копит обучение пакетами: отправка при BRAIN_CLIENT_BATCH_SIZE записях
+# или раз в BRAIN_CLIENT_FLUSH_INTERVAL секунд.
+BRAIN_CLIENT_BATCH_SIZE = 256
+BRAIN_CLIENT_FLUSH_INTERVAL = 0.5
+
 # ======================================
 # 💬 РЕЖИМЫ РАБОТЫ / OPERATING MODES
 # ======================================
@@ -65,6 +96,27 @@ LOG_PATH = "log_state.json"
 Путь к файлу логов состояния (JSON)
 """
 
+TRACE_STORE_ENABLED = False
+"""
+Дополнительно писать трассировку в бинарный колоночный формат (core/trace_store.py).
+Поиск по тикам: python trace_query.py --from 4000000 --to 4000100
+"""
+
+TRACE_STORE_PATH = "data/trace.bin"
+"""
+Путь к бинарной трассировке (рядом создаётся индекс тиков trace.bin.idx)
+"""
+
+TRACE_BLOCK_RECORDS = 4096
+"""
+Записей в одном сжатом блоке: больше — лучше сжатие, меньше — точнее поиск по тику
+"""
+
+TRACE_COMPRESSION_LEVEL = 6
+"""
+Уровень сжатия zlib для блоков трассировки (1 — быстрее, 9 — компактнее)
+"""
+
 BRAIN_DB_PATH = "data/brain.db"
 """
 Путь к базе данных мозга (SQLite)
@@ -85,6 +137,23 @@ TRAINING_DATABASE_PATH = "json_database/phrases.json"
 Путь к базе фраз для обучения (список строк)
 """
 
+TRAINING_PROGRESS_PATH = "data/training_progress.json"
+"""
+Файл контрольной точки обучения: смещение записи для каждого файла базы
+"""
+
+TRAINING_HASH_INDEX_PATH = "data/training_hashes.txt"
+"""
+Индекс хэшей уже обученных фраз (по одному хэшу на строку, только дозапись)
+"""
+
+TRAINING_CHECKPOINT_EVERY = 1000
+"""
+Как часто (в записях) сохранять контрольную точку обучения.
+Перед каждой контрольной точкой сохраняется мозг, поэтому слишком малое
+значение замедлит обучение; меньше значение — меньше повторной работы после сбоя
+"""
+
 # =================================
 # 🌈 ЭМОЦИИ И НАСТРОЕНИЕ / EMOTIONS & MOOD
 # =================================
@@ -167,6 +236,61 @@ RESPONSE_DELAY = 2
 - >3: длинные паузы (созерцательный режим)
 """
 
+# =================================
+# 🔍 ПОХОЖИЕ СТИМУЛЫ / SIMILAR STIMULI
+# =================================
+
+SIMILARITY_ENABLED = True
+SIMILARITY_NGRAM = 3
+SIMILARITY_BANDS = 16
+SIMILARITY_ROWS = 1
+SIMILARITY_MIN_JACCARD = 0.4
+SIMILARITY_MIN_EDIT = 0.6
+SIMILARITY_EDIT_MAX_LEN = 16
+SIMILARITY_BUCKET_CAP = 128
+SIMILARITY_MAX_CANDIDATES = 32
+"""
+Поиск ближайшего известного стимула, если точного нет в мозге
+(опечатки, другие формы слова, почти те же фразы):
+- SIMILARITY_NGRAM: длина символьных n-грамм
+- SIMILARITY_BANDS, SIMILARITY_ROWS: полосы и строки MinHash-подписи (больше полос — выше полнота, дороже запрос;
+  одна строка в полосе нужна коротким словам: у опечатки и оригинала общих n-грамм бывает меньше половины)
+- SIMILARITY_MIN_JACCARD: минимальное сходство по n-граммам, ниже — запасная эмоция
+- SIMILARITY_MIN_EDIT: или минимальное 1 - доля правок (только для коротких стимулов)
+- SIMILARITY_EDIT_MAX_LEN: стимулы до этой длины сравниваются ещё и расстоянием редактирования
+- SIMILARITY_BUCKET_CAP: максимум стимулов в одной корзине
+- SIMILARITY_MAX_CANDIDATES: максимум кандидатов для точной проверки на запрос
+Полнота на опечатках и словоформах проверяется так: python -m core.similarity
+"""
+
+ASSOCIATION_ENABLED = True
+ASSOCIATION_WALK_HOPS = 3
+ASSOCIATION_WALK_CACHE = 10000
+ASSOCIATION_REBUILD_MIN = 1024
+ASSOCIATION_REBUILD_FRACTION = 0.05
+"""
+Граф ассоциаций мозга «стимул → ответ» (core/association.py):
+- ASSOCIATION_ENABLED: компилировать связи мозга в граф для многошаговых откликов
+- ASSOCIATION_WALK_HOPS: сколько шагов по ассоциациям делает сгенерированный отклик
+- ASSOCIATION_WALK_CACHE: сколько обходов держать в кэше
+- ASSOCIATION_REBUILD_MIN, ASSOCIATION_REBUILD_FRACTION: новые связи вливаются в граф пересборкой,
+  когда их накопилось не меньше REBUILD_MIN и не меньше доли REBUILD_FRACTION от всех связей
+"""
+
+# =================================
+# 📥 ОЧЕРЕДЬ ВВОДА / INPUT QUEUE
+# =================================
+
+INGESTION_CAPACITY = 10000
+INGESTION_OVERFLOW_POLICY = "block"
+INGESTION_PUT_TIMEOUT = 5.0
+"""
+Ограничения очередей ввода (слова и предложения):
+- INGESTION_CAPACITY: максимум элементов в каждой очереди
+- INGESTION_OVERFLOW_POLICY: "block" — ждать места, "drop_oldest" — вытеснять старые, "reject" — отклонять новые
+- INGESTION_PUT_TIMEOUT: сколько секунд производитель ждёт места при "block" (None — без ограничения)
+"""
+
 # =================================
 # 🔄 САМОРЕГУЛЯЦИЯ / INTERNAL BALANCING
 # =================================
@@ -192,6 +316,18 @@ MOOD_DEFAULT = "нейтрально"
 Параметры управления энергией и настроением существа.
 """
 
+EMOTION_EWMA_ALPHA = 0.1
+MOOD_MIN_WEIGHT = 0.2
+EMOTION_SNAPSHOT_EVERY = 10
+EMOTION_SNAPSHOT_CAPACITY = 360
+"""
+Потоковая сводка эмоций (core/emotion_stream.py), из которой выводится настроение:
+- EMOTION_EWMA_ALPHA: вес нового отклика в скользящем среднем (больше — быстрее меняется настроение)
+- MOOD_MIN_WEIGHT: минимальный вес доминирующей эмоции, ниже — настроение по умолчанию
+- EMOTION_SNAPSHOT_EVERY: как часто (в тиках) сохранять снимок эмоционального вектора
+- EMOTION_SNAPSHOT_CAPACITY: сколько последних снимков хранить
+"""
+
 # ====================================
 # 🔥 ЭНЕРГИЯ ЧАКР / CHAKRA ENERGY CONFIGURATION
 # ====================================
@@ -272,6 +408,12 @@ MERGE_THRESHOLD_HIGH = 0.8
 Порог для слияния сигналов. Контролирует, когда несколько сигналов должны объединяться в одно целое.
 """
 
+RESONANCE_FREQUENCY_BINS = 100
+"""
+Число корзин частот для поиска резонанса (частоты вибраций берутся по модулю).
+Совпадает с диапазоном hash(word) % 100 в forge_vibration.
+"""
+
 # 🎵 Вибрации / VIBRATIONS
 # =============================
 
@@ -280,6 +422,42 @@ VIBRATION_DECAY_RATE = 0.03
 Скорость затухания вибраций.
 """
 
+# ============================== 
+# 🧮 УЧЁТ ПАМЯТИ И ПРОФИЛИРОВАНИЕ / MEMORY ACCOUNTING & PROFILING
+# ==============================
+
+INTROSPECTION_ENABLED = False
+INTROSPECTION_SAMPLE_EVERY = 10000
+INTROSPECTION_HISTORY = 100
+INTROSPECTION_TRACEMALLOC = False
+INTROSPECTION_TOP_LINES = 20
+INTROSPECTION_SAMPLE_LIMIT = 10000
+"""
+Учёт памяти по подсистемам существа (core/introspection.py):
+- INTROSPECTION_ENABLED: подключать учёт при создании существа
+- INTROSPECTION_SAMPLE_EVERY: раз в сколько тиков снимать полный размер подсистем (0 — только вручную)
+- INTROSPECTION_HISTORY: сколько последних снимков хранить
+- INTROSPECTION_TRACEMALLOC: отслеживать прирост выделений по строкам кода (замедляет работу)
+- INTROSPECTION_TOP_LINES: сколько строк показывать в отчётах tracemalloc и профилировщика
+- INTROSPECTION_SAMPLE_LIMIT: контейнеры больше этого числа элементов оцениваются по равномерной выборке (0 — считать точно)
+"""
+
+# ============================== 
+# 💾 КОНТРОЛЬНАЯ ТОЧКА СУЩЕСТВА / BEING CHECKPOINT
+# ==============================
+
+CHECKPOINT_ENABLED = False
+CHECKPOINT_PATH = "data/being.ckpt"
+CHECKPOINT_EVERY_TICKS = 1000
+CHECKPOINT_COMPRESSION_LEVEL = 1
+"""
+Полный снимок существа для перезапуска без потери контекста (core/checkpoint.py):
+- CHECKPOINT_ENABLED: восстанавливать существо при запуске и сохранять его во время работы
+- CHECKPOINT_PATH: файл снимка (рядом дописывается долговременная память being.ckpt.lt)
+- CHECKPOINT_EVERY_TICKS: раз в сколько активных тиков сохранять снимок (0 — только вручную)
+- CHECKPOINT_COMPRESSION_LEVEL: уровень сжатия zlib (1 — быстрее, 9 — компактнее)
+"""
+
 # ============================== 
 # 📌 ДОПОЛНИТЕЛЬНО / OPTIONAL
 # ==============================
@@ -0,0 +1,125 @@
+from array import array
+from collections import deque
+from core.config import (
+    EMOTION_MAP,
+    CHAKRA_MAP,
+    MOOD_DEFAULT,
+    MOOD_MIN_WEIGHT,
+    EMOTION_EWMA_ALPHA,
+    EMOTION_SNAPSHOT_EVERY,
+    EMOTION_SNAPSHOT_CAPACITY
+)
+
+EMOTION_CODES = list(dict.fromkeys(EMOTION_MAP.values()))
+CHAKRA_CODES = list(dict.fromkeys(CHAKRA_MAP.values()))
+EMOTION_LABELS = {code: label for label, code in EMOTION_MAP.items()}
+
+def _index(mapping, codes, offset=0):
+    """Индекс по коду и по русскому названию (вибрации несут и то и другое)."""
+    index = {code: offset + i for i, code in enumerate(codes)}
+    for label, code in mapping.items():
+        index[label] = index[code]
+    return index
+
+class EmotionAggregator:
+    """
+    Потоковая сводка эмоций: экспоненциальное скользящее среднее
+    интенсивности по каждой эмоции и чакре в массиве фиксированного размера.
+
+    Обновление O(1): вместо затухания всех ячеек на каждом событии
+    храним общий множитель scale (истинное значение = ячейка * scale),
+    а доминирующая эмоция поддерживается инкрементально — при общем
+    затухании порядок меняет только обновлённая ячейка.
+    """
+
+    def __init__(
+            self,
+            alpha=EMOTION_EWMA_ALPHA,
+            snapshot_every=EMOTION_SNAPSHOT_EVERY,
+            snapshot_capacity=EMOTION_SNAPSHOT_CAPACITY,
+        ):
+        self.alpha = alpha
+        self.snapshot_every = snapshot_every
+        self.emotion_index = _index(EMOTION_MAP, EMOTION_CODES)
+        self.chakra_index = _index(CHAKRA_MAP, CHAKRA_CODES, offset=len(EMOTION_CODES))
+
+        self.values = array("d", [0.0] * (len(EMOTION_CODES) + len(CHAKRA_CODES)))
+        self.scale = 1.0
+        self.dominant = None
+        self.events = 0
+
+        self.snapshots = deque(maxlen=snapshot_capacity)  # (тик, вектор)
+        self._last_snapshot_tick = None
+
+    def update(self, emotion, chakra, intensity=1.0, tick=None):
+        self.scale *= 1.0 - self.alpha
+        if self.scale < 1e-100:
+            self._renormalize()
+
+        add = self.alpha * intensity / self.scale
+        emotion_i = self.emotion_index.get(emotion)
+        if emotion_i is not None:
+            self.values[emotion_i] += add
+            if self.dominant is None or self.values[emotion_i] > self.values[self.dominant]:
+                self.dominant = emotion_i
+
+        chakra_i = self.chakra_index.get(chakra)
+        if chakra_i is not None:
+            self.values[chakra_i] += add
+
+        self.events += 1
+        if tick is not None and (
+            self._last_snapshot_tick is None
+            or tick - self._last_snapshot_tick >= self.snapshot_every
+        ):
+            self.snapshots.append((tick, self.vector_array()))
+            self._last_snapshot_tick = tick
+
+    def restore(self, values, scale, dominant, events, snapshots):
+        """Состояние из контрольной точки (core/checkpoint.py)."""
+        self.values = array("d", values)
+        self.scale = scale
+        self.dominant = dominant
+        self.events = events
+        self.snapshots.clear()
+        self.snapshots.extend(snapshots)
+        self._last_snapshot_tick = self.snapshots[-1][0] if self.snapshots else None
+
+    def _renormalize(self):
+        for i in range(len(self.values)):
+            self.values[i] *= self.scale
+        self.scale = 1.0
+
+    def vector_array(self):
+        """Истинные значения всех ячеек (эмоции, затем чакры)."""
+        return array("d", (v * self.scale for v in self.values))
+
+    def emotion_vector(self):
+        return {code: self.values[i] * self.scale for i, code in enumerate(EMOTION_CODES)}
+
+    def chakra_vector(self):
+        offset = len(EMOTION_CODES)
+        return {code: self.values[offset + i] * self.scale for i, code in enumerate(CHAKRA_CODES)}
+
+    def mood(self):
+        if self.dominant is None or self.values[self.dominant] * self.scale < MOOD_MIN_WEIGHT:
+            return MOOD_DEFAULT
+        code = EMOTION_CODES[self.dominant]
+        return EMOTION_LABELS.get(code, code)
+
+    def window(self, ticks, now):
+        """
+        Средний эмоциональный вектор по снимкам за последние ticks тиков
+        (без прохода по памяти существа).
+        """
+        total = array("d", [0.0] * len(self.values))
+        count = 0
+        for tick, vector in reversed(self.snapshots):
+            if tick < now - ticks:
+                break
+            for i, v in enumerate(vector):
+                total[i] += v
+            count += 1
+        if not count:
+            return {}
+        return {code: total[i] / count for i, code in enumerate(EMOTION_CODES)}
@@ -1,9 +1,9 @@
 # Все импорты из других файлов централизуем здесь
-from core.vibration import VibrationalBeing
+from core.vibration import Vibration
 from core.state import State
 from core.memory import Memory
 from core.essence import Essence
 from core.genome import Genome
 from core.chakra import Chakra
 from core.logger import log_message
-from core.vibrational_being import VibrationalBeing
\ No newline at end of file
+from core.vibrational_being import VibrationalBeing
@@ -0,0 +1,154 @@
+import time
+import threading
+from collections import deque
+from core.config import (
+    INGESTION_CAPACITY,
+    INGESTION_OVERFLOW_POLICY,
+    INGESTION_PUT_TIMEOUT
+)
+
+POLICY_BLOCK = "block"
+POLICY_DROP_OLDEST = "drop_oldest"
+POLICY_REJECT = "reject"
+
+class IngestionQueue:
+    """
+    Ограниченная потокобезопасная очередь ввода: много производителей
+    (stdin, обучение, чат) и один потребитель — поток тиков.
+
+    При переполнении действует политика:
+    - "block": производитель ждёт места (не дольше timeout, затем отказ);
+    - "drop_oldest": самые старые элементы вытесняются;
+    - "reject": новый элемент отклоняется сразу.
+
+    Для deque-совместимости поддерживаются popleft(), len() и bool().
+    """
+
+    def __init__(
+            self,
+            capacity=INGESTION_CAPACITY,
+            policy=INGESTION_OVERFLOW_POLICY,
+            timeout=INGESTION_PUT_TIMEOUT,
+        ):
+        if policy not in (POLICY_BLOCK, POLICY_DROP_OLDEST, POLICY_REJECT):
+            raise ValueError(f"Неизвестная политика переполнения: {policy}")
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self.timeout = timeout
+
+        self._items = deque()  # (элемент, время постановки)
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+
+        self.last_enqueued_at = None
+        self.last_wait = 0.0
+        self._enqueued = 0
+        self._dequeued = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._max_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._blocked_seconds = 0.0
+
+    def put(self, item, timeout=None):
+        return self.put_many([item], timeout=timeout) == 1
+
+    def put_many(self, items, timeout=None, force=False):
+        """
+        Атомарная постановка пакета (например, всех слов фразы):
+        пакет принимается целиком или не принимается вовсе.
+        force=True — без учёта ёмкости; нужно потребителю, который
+        перекладывает элементы внутри тика и не должен блокироваться.
+        Возвращает число принятых элементов.
+        """
+        items = list(items)
+        if not items:
+            return 0
+
+        with self._lock:
+            if not force and not self._make_room(len(items), timeout):
+                self._rejected += len(items)
+                return 0
+
+            now = time.monotonic()
+            self._items.extend((item, now) for item in items)
+            self._enqueued += len(items)
+            self._max_depth = max(self._max_depth, len(self._items))
+            return len(items)
+
+    def _make_room(self, count, timeout):
+        # Пакет больше ёмкости помещается только в пустую очередь
+        needed = min(count, self.capacity)
+
+        if self.capacity - len(self._items) >= needed:
+            return True
+
+        if self.policy == POLICY_REJECT:
+            return False
+
+        if self.policy == POLICY_DROP_OLDEST:
+            while self._items and self.capacity - len(self._items) < needed:
+                self._items.popleft()
+                self._dropped += 1
+            return True
+
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        fits = self._not_full.wait_for(lambda: self.capacity - len(self._items) >= needed, timeout)
+        self._blocked_seconds += time.monotonic() - started
+        return fits
+
+    def popleft(self):
+        with self._lock:
+            item, enqueued_at = self._items.popleft()
+            wait = time.monotonic() - enqueued_at
+            self.last_enqueued_at = enqueued_at
+            self.last_wait = wait
+            self._dequeued += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            self._not_full.notify_all()
+            return item
+
+    def peek(self):
+        """Первый элемент без извлечения или None."""
+        with self._lock:
+            return self._items[0][0] if self._items else None
+
+    def free(self):
+        """Сколько элементов ещё помещается до ёмкости."""
+        return max(0, self.capacity - len(self._items))
+
+    def items(self):
+        """Копия содержимого без меток времени (для контрольных точек и отладки)."""
+        with self._lock:
+            return [item for item, _ in self._items]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._not_full.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "depth": len(self._items),
+                "capacity": self.capacity,
+                "policy": self.policy,
+                "max_depth": self._max_depth,
+                "enqueued": self._enqueued,
+                "dequeued": self._dequeued,
+                "dropped": self._dropped,
+                "rejected": self._rejected,
+                "avg_wait_ms": self._total_wait / self._dequeued * 1000 if self._dequeued else 0.0,
+                "max_wait_ms": self._max_wait * 1000,
+                "oldest_wait_ms": (time.monotonic() - self._items[0][1]) * 1000 if self._items else 0.0,
+                "producer_blocked_ms": self._blocked_seconds * 1000,
+            }
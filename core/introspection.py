@@ -0,0 +1,236 @@
+import sys
+import time
+import threading
+import types
+import tracemalloc
+from collections import deque
+from core.config import (
+    INTROSPECTION_SAMPLE_EVERY,
+    INTROSPECTION_HISTORY,
+    INTROSPECTION_TRACEMALLOC,
+    INTROSPECTION_TOP_LINES,
+    INTROSPECTION_SAMPLE_LIMIT
+)
+
+# Общие для всего процесса объекты не относятся ни к одной подсистеме
+_SKIP_TYPES = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType,
+    types.MethodType, types.CodeType, types.FrameType,
+)
+
+def _snapshot(obj):
+    """
+    Копия содержимого контейнера (для словаря — ключей) одним вызовом:
+    другие потоки могут менять его на ходу.
+    """
+    for _ in range(3):
+        try:
+            return list(obj)
+        except RuntimeError:
+            continue  # контейнер изменился во время копирования
+    return []
+
+def deep_sizeof(root, sample_limit=INTROSPECTION_SAMPLE_LIMIT):
+    """
+    Полный размер объекта со всем, что он держит: (байты, число объектов).
+    Обход итеративный, каждый объект считается один раз.
+
+    У контейнера больше sample_limit элементов обходится только
+    равномерная выборка из sample_limit элементов, и её размер
+    масштабируется на весь контейнер: оценка вместо секунд на большой
+    мозг. sample_limit=0 — считать точно.
+    """
+    seen = set()
+    stack = [(root, 1.0)]
+    total = 0.0
+    count = 0.0
+
+    while stack:
+        obj, weight = stack.pop()
+        if id(obj) in seen or isinstance(obj, _SKIP_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj) * weight
+        count += weight
+
+        if isinstance(obj, (dict, list, tuple, set, frozenset, deque)):
+            items = _snapshot(obj)
+            if sample_limit and len(items) > sample_limit:
+                picked = items[::len(items) // sample_limit]
+                weight *= len(items) / len(picked)
+                items = picked
+            if isinstance(obj, dict):
+                for key in items:
+                    stack.append((key, weight))
+                    stack.append((obj.get(key), weight))
+            else:
+                stack.extend((item, weight) for item in items)
+        elif isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+            continue
+        else:
+            attrs = getattr(obj, "__dict__", None)
+            if attrs is not None:
+                stack.append((attrs, weight))
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append((getattr(obj, slot), weight))
+
+    return int(total), int(round(count))
+
+def being_subsystems(being):
+    """Что считать по подсистемам существа: имя → корневой объект."""
+    from core import logger
+
+    subsystems = {
+        "brain.memory": getattr(being.brain, "memory", None),
+        "brain.similar": getattr(being.brain, "similar", None),
+        "brain.graph": getattr(being.brain, "graph", None),
+        "memory.short_term": being.memory.short_term,
+        "memory.long_term": being.memory.long_term,
+        "vibrations": being.vibrations,
+        "queues": [being.input_queue.items(), being.sentence_queue.items(), being.sentence_buffer],
+        "state": being.state,
+        "chakras": being.chakras,
+        "logger.tick_buffer": logger._tick_buffer,
+        "logger.input_buffer": logger._input_buffer,
+    }
+    if logger._trace_writer is not None:
+        subsystems["logger.trace_writer"] = logger._trace_writer
+    return {name: root for name, root in subsystems.items() if root is not None}
+
+class Introspector:
+    """
+    Учёт памяти и профилирование работающего существа.
+
+    on_tick() вызывается из потока тиков в конце update(): раз в
+    sample_every тиков в фоновом потоке снимается размер каждой
+    подсистемы (и, если включён tracemalloc, прирост выделений по
+    строкам исходников) — тик его не ждёт. Запрошенное через
+    profile_ticks() профилирование включается и выключается ровно
+    на границах тиков.
+    """
+
+    def __init__(
+            self,
+            being,
+            sample_every=INTROSPECTION_SAMPLE_EVERY,
+            history=INTROSPECTION_HISTORY,
+            use_tracemalloc=INTROSPECTION_TRACEMALLOC,
+            top_lines=INTROSPECTION_TOP_LINES,
+            sample_limit=INTROSPECTION_SAMPLE_LIMIT,
+        ):
+        self.being = being
+        self.sample_every = sample_every
+        self.sample_limit = sample_limit
+        self.top_lines = top_lines
+        self.samples = deque(maxlen=history)
+        self._last_sample_tick = None
+        self._sampler = None
+
+        self._tracemalloc_snapshot = None
+        if use_tracemalloc:
+            self.start_tracemalloc()
+
+        self._profile_request = None  # (тиков, путь, сортировка)
+        self._profiler = None
+        self._profile_left = 0
+        self._profile_path = None
+        self._profile_sort = None
+        self.profile_result = None
+
+    def sample(self):
+        started = time.perf_counter()
+        report = {"tick": self.being.tick, "subsystems": {}}
+        for name, root in being_subsystems(self.being).items():
+            size, objects = deep_sizeof(root, self.sample_limit)
+            report["subsystems"][name] = {"bytes": size, "objects": objects}
+
+        if self._tracemalloc_snapshot is not None:
+            report["allocation_growth"] = self.allocation_growth()
+
+        report["seconds"] = time.perf_counter() - started
+        self.samples.append(report)
+        return report
+
+    def start_tracemalloc(self, frames=1):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._tracemalloc_snapshot = tracemalloc.take_snapshot()
+
+    def stop_tracemalloc(self):
+        self._tracemalloc_snapshot = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def allocation_growth(self):
+        """Прирост выделений по строкам исходников с прошлого снимка."""
+        snapshot = tracemalloc.take_snapshot()
+        diff = snapshot.compare_to(self._tracemalloc_snapshot, "lineno")
+        self._tracemalloc_snapshot = snapshot
+        return [
+            {
+                "line": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size,
+            }
+            for stat in diff[:self.top_lines]
+        ]
+
+    def profile_ticks(self, ticks, path=None, sort="cumulative"):
+        """
+        Профилировать следующие ticks тиков (cProfile). Можно вызывать
+        из любого потока: включение произойдёт в потоке тиков.
+        Результат — в profile_result (текст) и, если задан path, в файле pstats.
+        """
+        self._profile_request = (max(1, ticks), path, sort)
+
+    def on_tick(self, tick):
+        if self._profiler is not None:
+            self._profile_left -= 1
+            if self._profile_left <= 0:
+                self._finish_profile()
+
+        if self.sample_every and (
+            self._last_sample_tick is None
+            or tick - self._last_sample_tick >= self.sample_every
+        ):
+            # Пока прошлый снимок не досчитан, новый не начинается
+            if self._sampler is None or not self._sampler.is_alive():
+                self._last_sample_tick = tick
+                self._sampler = threading.Thread(target=self.sample, name="being-introspection", daemon=True)
+                self._sampler.start()
+
+        # Профилировщик включается последним, чтобы не мерить сам снимок памяти
+        if self._profile_request is not None and self._profiler is None:
+            import cProfile
+            ticks, self._profile_path, self._profile_sort = self._profile_request
+            self._profile_request = None
+            self._profile_left = ticks
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def _finish_profile(self):
+        import io
+        import pstats
+
+        profiler, self._profiler = self._profiler, None
+        profiler.disable()
+        if self._profile_path:
+            profiler.dump_stats(self._profile_path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats(self._profile_sort).print_stats(self.top_lines)
+        self.profile_result = out.getvalue()
+
+    def report(self):
+        """Последний снимок в читаемом виде."""
+        if not self.samples:
+            return "Снимков памяти ещё нет."
+        last = self.samples[-1]
+        approx = " ≈" if self.sample_limit else ""
+        lines = [f"🧮 Память на тике {last['tick']}{approx} (снято за {last['seconds'] * 1000:.1f} мс):"]
+        for name, info in sorted(last["subsystems"].items(), key=lambda kv: -kv[1]["bytes"]):
+            lines.append(f"   {name}: {info['bytes'] / 1024:.1f} КБ, объектов: {info['objects']}")
+        for growth in last.get("allocation_growth", []):
+            lines.append(f"   + {growth['line']}: {growth['size_diff']:+d} байт ({growth['count_diff']:+d})")
+        return "\n".join(lines)
@@ -1,21 +1,23 @@
 import os
 import json
-import requests
 import logging
+from core.progress import TrainingProgress
 
 # Настроим логирование
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger()
 
 class TrainingModel:
-    def __init__(self, api_url, json_folder_path):
+    def __init__(self, api_url, json_folder_path, progress=None):
         """
         Инициализация класса с указанием URL для API и пути к папке с JSON.
         :param api_url: URL для отправки запроса к модели
         :param json_folder_path: Путь к папке с JSON
+        :param progress: TrainingProgress для продолжения после сбоя (по умолчанию — свой, с файлами "model")
         """
         self.api_url = api_url  # URL для API (существующий API вашего проекта)
         self.json_folder_path = json_folder_path  # Путь к папке с JSON
+        self.progress = progress or TrainingProgress(name="model")  # Контрольные точки и индекс дубликатов
         self.json_files = self.load_json_files()  # Загрузка всех JSON файлов
 
     def load_json_files(self):
@@ -23,7 +25,7 @@ class TrainingModel:
         json_files = []
         try:
             # Получаем список всех файлов JSON в папке
-            for filename in os.listdir(self.json_folder_path):
+            for filename in sorted(os.listdir(self.json_folder_path)):
                 if filename.endswith('.json'):
                     json_files.append(os.path.join(self.json_folder_path, filename))
             logger.info(f"Найдено {len(json_files)} JSON файлов.")
@@ -46,6 +48,8 @@ class TrainingModel:
         :param input_string: строка для отправки в модель
         :return: ответ от модели
         """
+        import requests  # Импорт при первом запросе: не замедляет запуск существа
+
         try:
             # Отправляем данные на существующий сервер через POST запрос
             response = requests.post(self.api_url, json={"input": input_string})
@@ -68,23 +72,45 @@ class TrainingModel:
 
     def process_json_file(self, json_file):
         """
-        Обработка одного JSON файла.
+        Обработка одного JSON файла с продолжения последней контрольной точки.
+        Фразы, уже отправленные в модель (в этом или прошлых запусках), пропускаются.
         :param json_file: путь к файлу JSON
         """
         try:
+            start_offset = self.progress.begin_file(json_file)
+            if start_offset is None:
+                logger.info(f"Файл уже обработан, пропуск: {json_file}")
+                return
+
             with open(json_file, 'r', encoding='utf-8') as file:
                 data = json.load(file)
-                logger.info(f"Обработка файла: {json_file}")
-                
-                for key, entry in data.items():
-                    input_string = self.prepare_input_string(entry)
-                    logger.info(f"Отправка строки в модель: {input_string}")
-                    response = self.send_to_model(input_string)
-                    self.log_response(response, json_file)
+            logger.info(f"Обработка файла: {json_file} (с записи {start_offset})")
+
+            entries = list(data.values())
+            for offset in range(start_offset, len(entries)):
+                input_string = self.prepare_input_string(entries[offset])
+                if self.progress.is_duplicate(input_string):
+                    self.progress.skip_duplicate(json_file, offset)
+                    continue
+
+                logger.info(f"Отправка строки в модель: {input_string}")
+                response = self.send_to_model(input_string)
+                self.log_response(response, json_file)
+                if response is None:
+                    # Не продвигаем контрольную точку: запись повторится при следующем запуске
+                    self.progress.checkpoint()
+                    return
+                self.progress.mark_done(json_file, offset, input_string)
+
+            self.progress.finish_file(json_file)
         except Exception as e:
             logger.error(f"Ошибка при обработке файла {json_file}: {e}")
 
     def process_all_files(self):
         """Обработка всех файлов в папке"""
-        for json_file in self.json_files:
-            self.process_json_file(json_file)
+        try:
+            for json_file in self.json_files:
+                self.process_json_file(json_file)
+        finally:
+            self.progress.checkpoint()
+            logger.info(f"Итог обучения: {self.progress.report()}")
@@ -1,6 +1,7 @@
 import os
-import inspect
-from core.config import LOG_EVERY_N_TICKS, LOG_PATH
+import sys
+import atexit
+from core.config import LOG_EVERY_N_TICKS, LOG_PATH, TRACE_STORE_ENABLED
 
 log_dir = os.path.dirname(LOG_PATH)
 if log_dir:
@@ -9,6 +10,36 @@ if log_dir:
 _tick_buffer = {}
 _input_buffer = {}
 _last_written_tick = 0
+_trace_writer = None
+_trace_path = None
+
+def get_trace_writer():
+    global _trace_writer
+    if _trace_writer is None:
+        from core.trace_store import TraceWriter
+        _trace_writer = TraceWriter(_trace_path) if _trace_path else TraceWriter()
+        atexit.register(_trace_writer.close)
+    return _trace_writer
+
+def redirect(log_path, trace_path=None):
+    """
+    Писать лог (и трассировку) в другие файлы — например, нагрузочный
+    тест пишет их рядом со своими мозгами, а не в LOG_PATH.
+    """
+    global LOG_PATH, _trace_writer, _trace_path
+    directory = os.path.dirname(log_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    LOG_PATH = log_path
+    if trace_path:
+        if _trace_writer is not None:
+            _trace_writer.close()
+            _trace_writer = None
+        _trace_path = trace_path
+
+def buffered():
+    """Сколько ещё не записано: (тиков, строк трассировки)."""
+    return len(_tick_buffer), sum(len(lines) for lines in list(_tick_buffer.values()))
 
 def log_trace_call(tick, class_name, method_name, args=None, kwargs=None):
     args_str = ",".join(repr(a) for a in args) if args else ""
@@ -16,9 +47,13 @@ def log_trace_call(tick, class_name, method_name, args=None, kwargs=None):
     all_args = ",".join(filter(None, [args_str, kwargs_str]))
     line = f"{class_name}.{method_name}({all_args})"
     _tick_buffer.setdefault(tick, []).append(line)
+    if TRACE_STORE_ENABLED:
+        get_trace_writer().append(tick, class_name, method_name, all_args)
 
 def log_input(tick, input_str):
     _input_buffer[tick] = input_str
+    if TRACE_STORE_ENABLED:
+        get_trace_writer().append(tick, input_str=input_str)
 
 def flush_tick(tick):
     global _last_written_tick
@@ -67,18 +102,35 @@ def flush_tick(tick):
             f.write(log_line + "\n")
             wrote_any = True
 
+    # Строки тиков, которые уже не попадут в лог, выбрасываются: их оставляет
+    # существо со своим счётчиком тиков, отставшее от записавшего
+    # (несколько существ в одном процессе), иначе буфер растёт без конца
+    for t in [t for t in list(_tick_buffer) if t <= end_tick]:
+        _tick_buffer.pop(t, None)
+    for t in [t for t in list(_input_buffer) if t <= end_tick]:
+        _input_buffer.pop(t, None)
+
     _last_written_tick = end_tick
 
+def resume_from_tick(tick):
+    """Существо восстановлено на тике tick: лог продолжается с него, а не с нуля."""
+    global _last_written_tick
+    _last_written_tick = max(_last_written_tick, tick)
+
 def trace_method(class_name):
     def decorator(method):
         def wrapper(self, *args, **kwargs):
             tick = getattr(self, "tick", None)
             if tick is None:
-                for frame in inspect.stack():
-                    local_self = frame.frame.f_locals.get("self")
-                    if local_self and hasattr(local_self, "tick"):
+                # Обход кадров без inspect.stack(): тот читает исходники каждого
+                # кадра и стоил ~1 мс на каждый вызов Brain/State/Memory
+                frame = sys._getframe(1)
+                while frame is not None:
+                    local_self = frame.f_locals.get("self")
+                    if local_self is not None and hasattr(local_self, "tick"):
                         tick = getattr(local_self, "tick")
                         break
+                    frame = frame.f_back
             if tick is None:
                 tick = 0
             log_trace_call(tick, class_name, method.__name__, args, kwargs)
@@ -86,7 +138,7 @@ def trace_method(class_name):
         return wrapper
     return decorator
 
-def log_message(tick, *, being=None, signal=None, reaction=None, vibration=None, response=None):
+def log_message(tick, *, being=None, signal=None, reaction=None, vibration=None, response=None, mood=None):
     parts = [f"T={tick}"]
     if signal:
         parts.append(f"INPUT='{signal}'")
@@ -95,5 +147,7 @@ def log_message(tick, *, being=None, signal=None, reaction=None, vibration=None,
     if vibration:
         parts.append(f"VIBE={getattr(vibration, 'word', '...')}")
     if response:
-        parts.append(f"OUTPUT={response.get('word', '...')}")
+        parts.append(f"OUTPUT={' '.join(response.get('chain') or [response.get('word', '...')])}")
+    if mood:
+        parts.append(f"MOOD={mood}")
     print(" ".join(parts))
\ No newline at end of file
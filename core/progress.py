@@ -0,0 +1,169 @@
+import os
+import json
+import hashlib
+from core.config import (
+    TRAINING_PROGRESS_PATH,
+    TRAINING_HASH_INDEX_PATH,
+    TRAINING_CHECKPOINT_EVERY
+)
+
+class TrainingProgress:
+    """
+    Контрольные точки обучения: смещение записи по каждому файлу базы
+    и индекс хэшей уже обученных фраз.
+
+    Смещения пишутся атомарно (временный файл + os.replace) раз в
+    checkpoint_every записей, хэши — дозаписью в отдельный файл.
+    Хэши сбрасываются на диск раньше смещений, поэтому после сбоя
+    запись может быть только пропущена как дубликат, но не потеряна.
+
+    У каждого потребителя свои файлы: name добавляется к именам путей
+    (data/training_progress_model.json), чтобы разные обучатели не
+    перетирали смещения и индекс хэшей друг друга.
+    """
+
+    def __init__(
+            self,
+            progress_path=TRAINING_PROGRESS_PATH,
+            index_path=TRAINING_HASH_INDEX_PATH,
+            checkpoint_every=TRAINING_CHECKPOINT_EVERY,
+            before_checkpoint=None,
+            name=None,
+        ):
+        self.name = name
+        self.progress_path = self.named_path(progress_path, name)
+        self.index_path = self.named_path(index_path, name)
+        self.checkpoint_every = max(1, checkpoint_every)
+        # Вызывается перед записью контрольной точки (например, brain.force_save),
+        # чтобы прогресс никогда не опережал сохранённые знания
+        self.before_checkpoint = before_checkpoint
+
+        self.files = {}  # путь → {"offset", "size", "mtime", "done"}
+        self.seen = set()
+        self._pending_hashes = []
+        self._since_checkpoint = 0
+
+        self.stats = {
+            "processed": 0,
+            "files_skipped": 0,
+            "entries_skipped": 0,
+            "duplicates_skipped": 0,
+        }
+
+        self.load()
+
+    @staticmethod
+    def named_path(path, name):
+        """data/training_hashes.txt + "model" → data/training_hashes_model.txt"""
+        if not name:
+            return path
+        root, ext = os.path.splitext(path)
+        return f"{root}_{name}{ext}"
+
+    @staticmethod
+    def phrase_hash(phrase):
+        normalized = " ".join(str(phrase).lower().split())
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _file_signature(self, path):
+        stat = os.stat(path)
+        return stat.st_size, int(stat.st_mtime)
+
+    def begin_file(self, path):
+        """
+        Возвращает смещение, с которого нужно продолжить файл,
+        или None, если файл уже полностью обработан.
+        Если файл изменился с прошлого запуска, он начинается заново
+        (уже обученные фразы всё равно отсеются по хэшу).
+        """
+        key = os.path.abspath(path)
+        size, mtime = self._file_signature(path)
+        record = self.files.get(key)
+
+        if record is None or record["size"] != size or record["mtime"] != mtime:
+            self.files[key] = {"offset": 0, "size": size, "mtime": mtime, "done": False}
+            return 0
+
+        if record["done"]:
+            self.stats["files_skipped"] += 1
+            return None
+
+        self.stats["entries_skipped"] += record["offset"]
+        return record["offset"]
+
+    def is_duplicate(self, phrase):
+        return self.phrase_hash(phrase) in self.seen
+
+    def skip_duplicate(self, path, offset):
+        self.stats["duplicates_skipped"] += 1
+        self.advance(path, offset)
+
+    def mark_done(self, path, offset, phrase):
+        """Запись offset файла path обучена."""
+        digest = self.phrase_hash(phrase)
+        if digest not in self.seen:
+            self.seen.add(digest)
+            self._pending_hashes.append(digest)
+        self.stats["processed"] += 1
+        self.advance(path, offset)
+
+    def advance(self, path, offset):
+        self.files[os.path.abspath(path)]["offset"] = offset + 1
+        self._since_checkpoint += 1
+        if self._since_checkpoint >= self.checkpoint_every:
+            self.checkpoint()
+
+    def finish_file(self, path):
+        self.files[os.path.abspath(path)]["done"] = True
+        self.checkpoint()
+
+    def checkpoint(self):
+        if self.before_checkpoint:
+            self.before_checkpoint()
+        self._flush_hashes()
+        self._write_progress()
+        self._since_checkpoint = 0
+
+    def _flush_hashes(self):
+        if not self._pending_hashes:
+            return
+        self._ensure_dir(self.index_path)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("\n".join(self._pending_hashes) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._pending_hashes.clear()
+
+    def _write_progress(self):
+        self._ensure_dir(self.progress_path)
+        tmp_path = self.progress_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.progress_path)
+
+    def load(self):
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                # Оборванная последняя строка (сбой во время дозаписи) отбрасывается
+                self.seen = {line.strip() for line in f if len(line.strip()) == 32}
+
+    def report(self):
+        s = self.stats
+        return (
+            f"обучено: {s['processed']}, "
+            f"пропущено готовых файлов: {s['files_skipped']}, "
+            f"пропущено записей по контрольной точке: {s['entries_skipped']}, "
+            f"пропущено дубликатов: {s['duplicates_skipped']}"
+        )
+
+    @staticmethod
+    def _ensure_dir(path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
@@ -0,0 +1,121 @@
+from itertools import chain
+from core.vibration import Vibration
+from core.config import MERGE_THRESHOLD_HIGH, RESONANCE_FREQUENCY_BINS, SILENCE_THRESHOLD
+
+class ResonanceEngine:
+    """
+    Пакетное слияние вибраций за один тик.
+
+    Частоты всех активных вибраций раскладываются в гистограмму по корзинам,
+    у каждой вибрации берётся доминирующая корзина. Вибрации с общей
+    доминирующей корзиной интерферируют; если их суммарная интенсивность
+    достигает порога слияния, группа сливается в одну вибрацию по правилам
+    Vibration.merge: объединение частот, интенсивность min(сумма, 1.0),
+    эмоция и чакра сильнейшей (при равенстве — более ранней).
+
+    Интенсивности берутся на тике now (затухание в замкнутой форме),
+    вибрации, затихшие ниже silence_threshold, отбрасываются.
+    """
+
+    def __init__(
+            self,
+            merge_threshold=MERGE_THRESHOLD_HIGH,
+            bins=RESONANCE_FREQUENCY_BINS,
+            silence_threshold=SILENCE_THRESHOLD,
+        ):
+        self.merge_threshold = merge_threshold
+        self.bins = bins
+        self.silence_threshold = silence_threshold
+        self.merged_total = 0
+        self.faded_total = 0
+
+    def histograms(self, np, vibrations):
+        """Гистограммы частот по корзинам; np — модуль NumPy, импортированный в step()."""
+        n = len(vibrations)
+        lengths = np.fromiter((len(v.frequencies) for v in vibrations), dtype=np.int64, count=n)
+        flat = np.fromiter(
+            chain.from_iterable(v.frequencies for v in vibrations),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        owners = np.repeat(np.arange(n), lengths)
+        hist = np.zeros((n, self.bins), dtype=np.float64)
+        np.add.at(hist, (owners, flat % self.bins), 1.0)
+        return hist, lengths, flat, owners
+
+    def step(self, vibrations, now=None):
+        """
+        Возвращает (новый список вибраций, сколько вибраций было слито).
+        Не слитые вибрации сохраняют порядок, слитые добавляются в конец.
+        """
+        n = len(vibrations)
+        if n == 0:
+            return vibrations, 0
+        if now is None:
+            now = max(v.tick for v in vibrations)
+
+        # NumPy импортируется при первом резонансе, а не при запуске
+        import numpy as np
+
+        intensities = np.fromiter((v.intensity_at(now) for v in vibrations), dtype=np.float64, count=n)
+        audible = intensities >= self.silence_threshold
+        if not audible.all():
+            self.faded_total += n - int(audible.sum())
+            vibrations = [vibrations[i] for i in np.flatnonzero(audible)]
+            intensities = intensities[audible]
+            n = len(vibrations)
+        if n < 2:
+            return vibrations, 0
+
+        hist, lengths, flat, owners = self.histograms(np, vibrations)
+
+        # Вибрации без частот получают служебную корзину self.bins и не сливаются
+        key = hist.argmax(axis=1)
+        key[lengths == 0] = self.bins
+
+        counts = np.bincount(key, minlength=self.bins + 1)
+        power = np.bincount(key, weights=intensities, minlength=self.bins + 1)
+        resonant = (counts >= 2) & (power >= self.merge_threshold)
+        resonant[self.bins] = False
+
+        member = resonant[key]
+        if not member.any():
+            return vibrations, 0
+
+        members = np.flatnonzero(member)
+
+        # Сильнейшая вибрация группы: сортировка по (корзина, -интенсивность, порядок)
+        order = members[np.lexsort((members, -intensities[members], key[members]))]
+        group_keys = key[order]
+        starts = np.flatnonzero(np.r_[True, group_keys[1:] != group_keys[:-1]])
+        strongest = order[starts]
+
+        # Объединение частот: уникальные пары (корзина группы, частота)
+        flat_member = member[owners]
+        freq_keys = key[owners][flat_member]
+        freq_values = flat[flat_member]
+        freq_order = np.lexsort((freq_values, freq_keys))
+        freq_keys = freq_keys[freq_order]
+        freq_values = freq_values[freq_order]
+        unique = np.r_[True, (freq_keys[1:] != freq_keys[:-1]) | (freq_values[1:] != freq_values[:-1])]
+        freq_keys = freq_keys[unique]
+        freq_values = freq_values[unique]
+        freq_splits = np.searchsorted(freq_keys, group_keys[starts])
+        freq_groups = np.split(freq_values, freq_splits[1:])
+
+        merged = []
+        for bin_id, lead, frequencies in zip(group_keys[starts], strongest, freq_groups):
+            leader = vibrations[lead]
+            merged.append(Vibration(
+                frequencies=frequencies.tolist(),
+                intensity=min(float(power[bin_id]), 1.0),
+                emotion=leader.emotion,
+                chakra=leader.chakra,
+                word="Merged",
+                source="merged",
+                tick=now
+            ))
+
+        kept = [vibrations[i] for i in np.flatnonzero(~member)]
+        self.merged_total += len(members)
+        return kept + merged, len(members)
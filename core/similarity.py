@@ -0,0 +1,207 @@
+import zlib
+import random
+import threading
+from core.config import (
+    SIMILARITY_NGRAM,
+    SIMILARITY_BANDS,
+    SIMILARITY_ROWS,
+    SIMILARITY_MIN_JACCARD,
+    SIMILARITY_MIN_EDIT,
+    SIMILARITY_EDIT_MAX_LEN,
+    SIMILARITY_BUCKET_CAP,
+    SIMILARITY_MAX_CANDIDATES
+)
+
+_PRIME = (1 << 31) - 1
+
+# Опечатки и словоформы → задуманное слово: на них меряется полнота поиска
+RECALL_PAIRS = [
+    ("привт", "привет"), ("любвь", "любовь"), ("радсть", "радость"), ("свте", "свет"),
+    ("пенся", "песня"), ("дрг", "друг"), ("свабода", "свобода"), ("счастя", "счастье"),
+    ("тишне", "тишина"), ("душу", "душа"), ("огня", "огонь"), ("любви", "любовь"),
+    ("сердцу", "сердце"), ("небе", "небо"), ("земли", "земля"), ("времени", "время"),
+    ("водой", "вода"), ("звёзды", "звезда"), ("ветра", "ветер"), ("мечты", "мечта"),
+    ("солнца", "солнце"), ("книгу", "книга"), ("улыбку", "улыбка"), ("надежду", "надежда"),
+]
+
+def normalize(text):
+    return text.lower().replace("ё", "е")
+
+def char_ngrams(text, n=SIMILARITY_NGRAM):
+    padded = f" {normalize(text)} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def edit_similarity(a, b, floor=0.0):
+    """
+    1 - расстояние редактирования / длина большей строки. Перестановка
+    соседних букв («свте» — «свет») считается одной правкой. Считается
+    с отсечкой: если сходство заведомо ниже floor, сразу 0.0.
+    """
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    limit = int((1 - floor) * longest + 1e-9)
+    if abs(len(a) - len(b)) > limit:
+        return 0.0
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return 0.0
+        before, previous = previous, current
+    return 1 - previous[-1] / longest if previous[-1] <= limit else 0.0
+
+class SimilarityIndex:
+    """
+    Приблизительный поиск ближайшего известного стимула (MinHash + LSH).
+
+    Каждый стимул — множество символьных n-грамм, сжатое в подпись
+    из bands * rows минимальных хэшей. Подпись режется на полосы,
+    каждая полоса — ключ корзины. Кандидаты собираются из совпавших
+    корзин; точно проверяются max_candidates совпавших в наибольшем числе
+    полос, поэтому время запроса не зависит от размера мозга.
+
+    Кандидаты ранжируются точным Жаккаром по n-граммам, а короткие
+    (до edit_max_len символов) — ещё и расстоянием редактирования:
+    у опечаток и словоформ коротких слов («огня» — «огонь») общих
+    n-грамм мало, хотя отличаются они на одну-две буквы.
+    """
+
+    def __init__(
+            self,
+            ngram=SIMILARITY_NGRAM,
+            bands=SIMILARITY_BANDS,
+            rows=SIMILARITY_ROWS,
+            min_similarity=SIMILARITY_MIN_JACCARD,
+            min_edit=SIMILARITY_MIN_EDIT,
+            edit_max_len=SIMILARITY_EDIT_MAX_LEN,
+            bucket_cap=SIMILARITY_BUCKET_CAP,
+            max_candidates=SIMILARITY_MAX_CANDIDATES,
+        ):
+        self.ngram = ngram
+        self.bands = bands
+        self.rows = rows
+        self.min_similarity = min_similarity
+        self.min_edit = min_edit
+        self.edit_max_len = edit_max_len
+        self.bucket_cap = bucket_cap
+        self.max_candidates = max_candidates
+
+        rng = random.Random(0x5EED)
+        self.hash_params = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(bands * rows)
+        ]
+        self._coef_a = None
+        self._coef_b = None
+        self.buckets = [{} for _ in range(bands)]
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def signature(self, grams):
+        # Все bands * rows хэш-функций по всем n-граммам одной матричной операцией
+        import numpy as np
+
+        if self._coef_a is None:
+            self._coef_a = np.array([a for a, _ in self.hash_params], dtype=np.uint64)[:, None]
+            self._coef_b = np.array([b for _, b in self.hash_params], dtype=np.uint64)[:, None]
+        hashed = np.fromiter(
+            (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+        )
+        return ((self._coef_a * hashed + self._coef_b) % _PRIME).min(axis=1).tolist()
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[i * rows:(i + 1) * rows])) for i in range(self.bands)]
+
+    def add(self, stimulus):
+        if not isinstance(stimulus, str) or not stimulus:
+            return
+        keys = self._band_keys(self.signature(char_ngrams(stimulus, self.ngram)))
+        with self._lock:
+            for band, key in zip(self.buckets, keys):
+                bucket = band.get(key)
+                if bucket is None:
+                    band[key] = [stimulus]
+                    continue
+                # Переполненная корзина вытесняет старейший стимул: время запроса ограничено
+                if len(bucket) >= self.bucket_cap:
+                    del bucket[0]
+                bucket.append(stimulus)
+            self.size += 1
+
+    def nearest(self, stimulus):
+        """Ближайший известный стимул со сходством не ниже порога или None."""
+        if not isinstance(stimulus, str) or not stimulus or not self.size:
+            return None
+
+        grams = char_ngrams(stimulus, self.ngram)
+        keys = self._band_keys(self.signature(grams))
+
+        # Чем в большем числе полос совпал стимул, тем он вероятнее похож:
+        # точно проверяются только max_candidates лучших
+        hits = {}
+        for band, key in zip(self.buckets, keys):
+            # Копия корзины: add() в другом потоке может её менять
+            for candidate in tuple(band.get(key, ())):
+                hits[candidate] = hits.get(candidate, 0) + 1
+        # При равном числе совпадений вперёд — близкие по длине (опечатки, словоформы)
+        length = len(stimulus)
+        candidates = sorted(hits, key=lambda c: (-hits[c], abs(len(c) - length)))[:self.max_candidates]
+
+        best, best_score = None, None
+        for candidate in candidates:
+            if candidate == stimulus:
+                continue
+            score = self.score(stimulus, grams, candidate)
+            if score is not None and (best_score is None or score >= best_score):
+                best, best_score = candidate, score
+        return best
+
+    def score(self, stimulus, grams, candidate):
+        """
+        (сходство, Жаккар) или None, если кандидат не проходит ни по
+        n-граммам, ни по правкам. При равном сходстве выше тот, у кого
+        больше общих n-грамм.
+        """
+        overlap = jaccard(grams, char_ngrams(candidate, self.ngram))
+        edit = 0.0
+        if len(stimulus) <= self.edit_max_len and len(candidate) <= self.edit_max_len:
+            edit = edit_similarity(normalize(stimulus), normalize(candidate), self.min_edit)
+        if overlap < self.min_similarity and edit < self.min_edit:
+            return None
+        return max(overlap, edit), overlap
+
+def recall(index, pairs=RECALL_PAIRS):
+    """Доля пар, для которых nearest() нашёл задуманное слово, и промахи (запрос, найденное)."""
+    found = [(query, target, index.nearest(query)) for query, target in pairs]
+    misses = [(query, result) for query, target, result in found if result != target]
+    return 1 - len(misses) / len(pairs), misses
+
+if __name__ == "__main__":
+    import sys
+
+    # Полнота на одних задуманных словах и среди случайных «слов»-помех
+    distractors = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(1)
+    letters = "абвгдежзийклмнопрстуфхцчшщьыэюя"
+    for count in (0, distractors):
+        index = SimilarityIndex()
+        for _, target in RECALL_PAIRS:
+            index.add(target)
+        for _ in range(count):
+            index.add("".join(rng.choice(letters) for _ in range(rng.randint(6, 12))))
+        share, misses = recall(index)
+        print(f"помех {count}: полнота {share:.0%}, промахи: {misses}")
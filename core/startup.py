@@ -0,0 +1,31 @@
+import time
+
+class StartupTimer:
+    """Замер этапов запуска: от импорта main.py до первого приглашения ввода."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.stages = []
+
+    def mark(self, label):
+        now = time.perf_counter()
+        self.stages.append((label, now - self.last))
+        self.last = now
+
+    def total(self):
+        return self.last - self.started
+
+    def report(self, brain=None):
+        lines = ["⏱️ Запуск:"]
+        for label, seconds in self.stages:
+            lines.append(f"   {label}: {seconds * 1000:.1f} мс")
+        lines.append(f"   всего: {self.total() * 1000:.1f} мс")
+        if brain is not None:
+            if brain.is_ready() and brain.load_seconds is not None:
+                lines.append(f"   мозг загружен за {brain.load_seconds * 1000:.1f} мс")
+            elif not brain.is_ready():
+                lines.append("   мозг загружается в фоне")
+        return "\n".join(lines)
+
+STARTUP = StartupTimer()
@@ -1,13 +1,29 @@
 from core.logger import trace_method
-from core.config import MIN_ENERGY_THRESHOLD, ENERGY_RECHARGE_RATE, MOOD_DEFAULT
+from core.emotion_stream import EmotionAggregator
+from core.clock import WORLD_CLOCK, DecayingValue
+from core.config import MIN_ENERGY_THRESHOLD, ENERGY_RECHARGE_RATE, MOOD_DEFAULT, RESTORE_RATE
 
 class State:
-    def __init__(self):
-        self.energy = 1.0
+    def __init__(self, clock=None):
+        self.clock = clock or WORLD_CLOCK
+        # Энергия восстанавливается к 1.0 со скоростью RESTORE_RATE за тик — лениво, при чтении
+        self._energy = DecayingValue(1.0, RESTORE_RATE, baseline=1.0, tick=self.clock.tick)
         self.active = 1
         self.min_energy_threshold = MIN_ENERGY_THRESHOLD
         self.energy_recharge_rate = ENERGY_RECHARGE_RATE
         self.mood = MOOD_DEFAULT
+        self.emotions = EmotionAggregator()
+
+    @property
+    def energy(self):
+        return self._energy.get(self.clock.tick)
+
+    @energy.setter
+    def energy(self, value):
+        self._energy.set(value, self.clock.tick)
+
+    def spend(self, amount):
+        self.energy = max(self.energy - amount, 0.0)
 
     @trace_method("State")
     def update(self):
@@ -15,3 +31,8 @@ class State:
             self.energy = min(self.energy + self.energy_recharge_rate, 1.0)
             if self.active == 0:
                 self.active = 1
+
+    @trace_method("State")
+    def feel(self, vibration, tick=None):
+        self.emotions.update(vibration.emotion, vibration.chakra, vibration.intensity, tick)
+        self.mood = self.emotions.mood()
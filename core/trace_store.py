@@ -0,0 +1,235 @@
+"""
+Бинарный колоночный формат трассировки.
+
+Файл данных — последовательность блоков:
+    заголовок  <4sIII>  magic, число записей, длина до сжатия, длина после сжатия
+    тело       zlib(колонки)
+
+Колонки внутри блока:
+    tick    — int64 на запись
+    class   — словарь строк блока + uint32 индекс на запись
+    method  — словарь строк блока + uint32 индекс на запись
+    args    — uint32 смещения (n + 1) + utf-8 данные
+    input   — uint32 смещения (n + 1) + utf-8 данные
+
+Рядом лежит разреженный индекс <path>.idx: одна запись <qqQI> на блок
+(первый тик, последний тик, смещение блока, число записей).
+"""
+import os
+import zlib
+import struct
+import bisect
+import threading
+from array import array
+from collections import namedtuple
+from core.config import TRACE_STORE_PATH, TRACE_BLOCK_RECORDS, TRACE_COMPRESSION_LEVEL
+
+BLOCK_MAGIC = b"SOBT"
+BLOCK_HEADER = struct.Struct("<4sIII")
+INDEX_ENTRY = struct.Struct("<qqQI")
+
+TraceRecord = namedtuple("TraceRecord", ["tick", "class_name", "method", "args", "input"])
+
+def pack_strings(values):
+    offsets = array("I", [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets.tobytes() + bytes(blob)
+
+def unpack_strings(payload, pos, count):
+    offsets = array("I")
+    size = (count + 1) * offsets.itemsize
+    offsets.frombytes(payload[pos:pos + size])
+    pos += size
+    blob = payload[pos:pos + offsets[-1]]
+    values = [blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)]
+    return values, pos + offsets[-1]
+
+def pack_dictionary(values):
+    table = {}
+    ids = array("I", (table.setdefault(v, len(table)) for v in values))
+    words = list(table)
+    return struct.pack("<I", len(words)) + pack_strings(words) + ids.tobytes()
+
+def unpack_dictionary(payload, pos, count):
+    (size,) = struct.unpack_from("<I", payload, pos)
+    words, pos = unpack_strings(payload, pos + 4, size)
+    ids = array("I")
+    ids.frombytes(payload[pos:pos + count * ids.itemsize])
+    return [words[i] for i in ids], pos + count * ids.itemsize
+
+class TraceWriter:
+    def __init__(
+            self,
+            path=TRACE_STORE_PATH,
+            block_records=TRACE_BLOCK_RECORDS,
+            compression_level=TRACE_COMPRESSION_LEVEL,
+        ):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.block_records = block_records
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._reset_columns()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._repair_index()
+
+    def _repair_index(self):
+        """
+        Обрезает оборванную при сбое запись в конце индекса: иначе все
+        новые записи легли бы со сдвигом и читались бы мусором.
+        """
+        if not os.path.exists(self.index_path):
+            return
+        size = os.path.getsize(self.index_path)
+        torn = size % INDEX_ENTRY.size
+        if torn:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(size - torn)
+
+    def _reset_columns(self):
+        self._ticks = array("q")
+        self._classes = []
+        self._methods = []
+        self._args = []
+        self._inputs = []
+
+    def append(self, tick, class_name="", method="", args="", input_str=""):
+        with self._lock:
+            self._ticks.append(tick)
+            self._classes.append(class_name)
+            self._methods.append(method)
+            self._args.append(args)
+            self._inputs.append(input_str)
+            if len(self._ticks) >= self.block_records:
+                self._write_block()
+
+    def flush(self):
+        with self._lock:
+            self._write_block()
+
+    close = flush
+
+    def _write_block(self):
+        count = len(self._ticks)
+        if not count:
+            return
+
+        raw = b"".join([
+            self._ticks.tobytes(),
+            pack_dictionary(self._classes),
+            pack_dictionary(self._methods),
+            pack_strings(self._args),
+            pack_strings(self._inputs),
+        ])
+        body = zlib.compress(raw, self.compression_level)
+
+        with open(self.path, "ab") as f:
+            offset = f.tell()
+            f.write(BLOCK_HEADER.pack(BLOCK_MAGIC, count, len(raw), len(body)))
+            f.write(body)
+
+        # Индекс дописывается после блока: оборванный блок без записи в индексе
+        # просто не будет найден, а не испортит чтение
+        with open(self.index_path, "ab") as f:
+            f.write(INDEX_ENTRY.pack(min(self._ticks), max(self._ticks), offset, count))
+
+        self._reset_columns()
+
+class TraceReader:
+    def __init__(self, path=TRACE_STORE_PATH):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.first_ticks = array("q")
+        self.last_ticks = array("q")
+        self.offsets = array("Q")
+        self.counts = array("I")
+        self.monotonic = True
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "rb") as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        for first, last, offset, count in INDEX_ENTRY.iter_unpack(data[:usable]):
+            self.first_ticks.append(first)
+            self.last_ticks.append(last)
+            self.offsets.append(offset)
+            self.counts.append(count)
+
+        # Бинарный поиск возможен, только если блоки идут по возрастанию тиков
+        # (после перезапуска существа тики начинаются заново)
+        self.monotonic = all(
+            self.last_ticks[i] <= self.first_ticks[i + 1]
+            for i in range(len(self.offsets) - 1)
+        )
+
+    def __len__(self):
+        return sum(self.counts)
+
+    def blocks_for(self, start=None, end=None):
+        """Номера блоков, которые могут содержать тики из [start, end]."""
+        total = len(self.offsets)
+        if not total:
+            return []
+        if self.monotonic:
+            first_block = bisect.bisect_left(self.last_ticks, start) if start is not None else 0
+            result = []
+            for i in range(first_block, total):
+                if end is not None and self.first_ticks[i] > end:
+                    break
+                result.append(i)
+            return result
+        return [
+            i for i in range(total)
+            if (start is None or self.last_ticks[i] >= start)
+            and (end is None or self.first_ticks[i] <= end)
+        ]
+
+    def read_block(self, i, f):
+        f.seek(self.offsets[i])
+        magic, count, raw_len, body_len = BLOCK_HEADER.unpack(f.read(BLOCK_HEADER.size))
+        if magic != BLOCK_MAGIC:
+            raise ValueError(f"Повреждённый блок трассировки по смещению {self.offsets[i]}")
+        payload = zlib.decompress(f.read(body_len))
+
+        ticks = array("q")
+        ticks.frombytes(payload[:count * ticks.itemsize])
+        pos = count * ticks.itemsize
+        classes, pos = unpack_dictionary(payload, pos, count)
+        methods, pos = unpack_dictionary(payload, pos, count)
+        args, pos = unpack_strings(payload, pos, count)
+        inputs, pos = unpack_strings(payload, pos, count)
+        return ticks, classes, methods, args, inputs
+
+    def records(self, start=None, end=None, class_name=None, method=None):
+        blocks = self.blocks_for(start, end)
+        if not blocks:
+            return
+        with open(self.path, "rb") as f:
+            for i in blocks:
+                ticks, classes, methods, args, inputs = self.read_block(i, f)
+                for j in range(len(ticks)):
+                    tick = ticks[j]
+                    if start is not None and tick < start:
+                        continue
+                    if end is not None and tick > end:
+                        continue
+                    if class_name is not None and classes[j] != class_name:
+                        continue
+                    if method is not None and methods[j] != method:
+                        continue
+                    yield TraceRecord(tick, classes[j], methods[j], args[j], inputs[j])
+
+def format_record(record):
+    """Строка в формате текстового лога (LOG_PATH)."""
+    if record.input:
+        return f"T={record.tick} INPUT='{record.input}'"
+    return f"T={record.tick} > {record.class_name}.{record.method}({record.args})"
@@ -1,20 +1,31 @@
 from core.logger import trace_method
+from core.config import VIBRATION_DECAY_RATE
 
 class Vibration:
-    def __init__(self, frequencies, intensity, emotion, chakra, word, source):
+    def __init__(self, frequencies, intensity, emotion, chakra, word, source, tick=0):
         self.frequencies = frequencies
-        self.intensity = intensity
+        self.intensity = intensity  # Интенсивность на тике tick; затухание досчитывается в intensity_at
         self.emotion = emotion
         self.chakra = chakra
         self.word = word
         self.source = source
+        self.tick = tick
+
+    def intensity_at(self, now):
+        elapsed = now - self.tick
+        if elapsed <= 0:
+            return self.intensity
+        return self.intensity * (1.0 - VIBRATION_DECAY_RATE) ** elapsed
 
     @trace_method("Vibration")
     def merge(self, other_vibration):
+        now = max(self.tick, other_vibration.tick)
+        own_intensity = self.intensity_at(now)
+        other_intensity = other_vibration.intensity_at(now)
         combined_frequencies = list(set(self.frequencies + other_vibration.frequencies))
-        combined_intensity = min(self.intensity + other_vibration.intensity, 1.0)
-        combined_emotion = self.emotion if self.intensity >= other_vibration.intensity else other_vibration.emotion
-        combined_chakra = self.chakra if self.intensity >= other_vibration.intensity else other_vibration.chakra
+        combined_intensity = min(own_intensity + other_intensity, 1.0)
+        combined_emotion = self.emotion if own_intensity >= other_intensity else other_vibration.emotion
+        combined_chakra = self.chakra if own_intensity >= other_intensity else other_vibration.chakra
 
         return Vibration(
             frequencies=combined_frequencies,
@@ -22,5 +33,6 @@ class Vibration:
             emotion=combined_emotion,
             chakra=combined_chakra,
             word="Merged",
-            source="merged"
+            source="merged",
+            tick=now
         )
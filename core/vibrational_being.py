@@ -1,10 +1,13 @@
-from collections import deque
+import threading
 from core.logger import trace_method, log_input, flush_tick, log_message
 from core.memory import Memory
 from core.state import State
 from core.brain import Brain
 from core.chakra import Chakra
 from core.vibration import Vibration
+from core.resonance import ResonanceEngine
+from core.ingestion import IngestionQueue
+from core.clock import WORLD_CLOCK
 from core.config import (
     DEFAULT_SPEAK_MODE,
     SILENCE_THRESHOLD,
@@ -19,12 +22,18 @@ from core.config import (
     EMOTION_MAP,
     CHAKRA_MAP,
     DEFAULT_EMOTION_LABEL,
-    DEFAULT_CHAKRA_LABEL
+    DEFAULT_CHAKRA_LABEL,
+    ASSOCIATION_WALK_HOPS,
+    INTROSPECTION_ENABLED,
+    CHECKPOINT_ENABLED
 )
 
 class VibrationalBeing:
-    def __init__(self, base_archetype="poet"):
+    def __init__(self, base_archetype="poet", brain=None, clock=None):
         self.tick = 0
+        # Часы, по которым затухают энергия, чакры и вибрации. Их продвигает
+        # управляющий цикл, а не update(): спящее существо не тратит ничего
+        self.clock = clock or WORLD_CLOCK
         self.base_archetype = base_archetype
 
         self.speak_mode = DEFAULT_SPEAK_MODE
@@ -38,60 +47,148 @@ class VibrationalBeing:
 
         self.vibration_decay = VIBRATION_DECAY_RATE
         self.merge_threshold_high = MERGE_THRESHOLD_HIGH
+        self.association_hops = ASSOCIATION_WALK_HOPS
 
         self.is_resonating = False
-        self.input_queue = deque()
-        self.sentence_queue = deque()
+        self.input_queue = IngestionQueue()
+        self.sentence_queue = IngestionQueue()
         self.sentence_buffer = []
         self.last_signal = None
         self.vibrations = []
+        self.resonance = ResonanceEngine(merge_threshold=self.merge_threshold_high)
 
         self.memory = Memory()
-        self.state = State()
-        self.brain = Brain()
+        self.state = State(clock=self.clock)
+        self.brain = brain if brain is not None else Brain()
         self.chakras = {}
 
+        # Необязательный наблюдатель (нагрузочный тест, метрики):
+        # вызывается как on_input_processed(сигнал, время постановки в очередь)
+        # после отклика на слово и после отклика на всё предложение (сигнал — его текст)
+        self.on_input_processed = None
+
+        self.introspector = None
+        if INTROSPECTION_ENABLED:
+            self.enable_introspection()
+
+        # Держится всё время активного тика: через него другие потоки
+        # (контрольная точка) видят согласованное состояние
+        self.tick_lock = threading.RLock()
+        self.checkpoint = None
+        if CHECKPOINT_ENABLED:
+            self.enable_checkpoints()
+
     @trace_method("VibrationalBeing")
-    def enqueue_input(self, input_signal: str):
-        if input_signal.strip():
-            words = input_signal.strip().lower().split()
-            if len(words) > 1:
-                self.sentence_queue.append(words)
-            else:
-                self.input_queue.append(input_signal.strip().lower())
+    def enqueue_input(self, input_signal: str, timeout=None):
+        """Возвращает False, если очередь переполнена и сигнал отклонён."""
+        if not input_signal.strip():
+            return False
+        words = input_signal.strip().lower().split()
+        if len(words) > 1:
+            return self.sentence_queue.put(words, timeout=timeout)
+        return self.input_queue.put(words[0], timeout=timeout)
+
+    @trace_method("VibrationalBeing")
+    def enqueue_phrases(self, phrases, timeout=None):
+        """
+        Пакетная постановка: одиночные слова одним пакетом в очередь слов,
+        фразы — одним пакетом в очередь предложений. Возвращает число принятых.
+        """
+        words, sentences = [], []
+        for phrase in phrases:
+            split = phrase.strip().lower().split()
+            if len(split) > 1:
+                sentences.append(split)
+            elif split:
+                words.append(split[0])
+        accepted = self.input_queue.put_many(words, timeout=timeout)
+        accepted += self.sentence_queue.put_many(sentences, timeout=timeout)
+        return accepted
+
+    def enable_introspection(self, **options):
+        """Подключает учёт памяти и профилирование (см. core/introspection.py)."""
+        from core.introspection import Introspector
+        self.introspector = Introspector(self, **options)
+        return self.introspector
+
+    def is_idle(self):
+        """Существу нечего делать: update() ничего не изменит, его можно не вызывать."""
+        return not self.is_resonating and not self.input_queue and not self.sentence_queue
+
+    def enable_checkpoints(self, **options):
+        """Подключает сохранение всего существа (см. core/checkpoint.py)."""
+        from core.checkpoint import BeingCheckpoint
+        self.checkpoint = BeingCheckpoint(self, **options)
+        return self.checkpoint
+
+    def queue_stats(self):
+        return {
+            "input": self.input_queue.stats(),
+            "sentence": self.sentence_queue.stats(),
+        }
 
     @trace_method("VibrationalBeing")
     def update(self):
-        if not self.is_resonating and not self.input_queue and not self.sentence_queue:
+        if self.is_idle():
             return
 
-        if not self.is_resonating and (self.input_queue or self.sentence_queue):
-            self.is_resonating = True
-            self.state.active = 1
+        with self.tick_lock:
+            if not self.is_resonating and (self.input_queue or self.sentence_queue):
+                self.is_resonating = True
+                self.state.active = 1
+
+            self.tick += 1
+            self.state.spend(self.energy_decay_rate)
+            self.state.update()
+
+            if self.input_queue:
+                current_input = self.input_queue.popleft()
+                self.last_signal = current_input
+                log_input(self.tick, current_input)
+                response = self.brain.predict_response(current_input)
+                self.react(response, is_sentence=False)
+                if self.on_input_processed is not None:
+                    self.on_input_processed(current_input, self.input_queue.last_enqueued_at)
+
+            if self.sentence_queue and self._sentence_fits():
+                sentence_words = self.sentence_queue.popleft()
+                self.sentence_buffer.extend(sentence_words)
+
+                # Место под слова уже проверено; force лишь не даёт потоку тиков
+                # ждать, если производитель успел занять его между проверкой и вставкой
+                self.input_queue.put_many(sentence_words, force=True)
+
+                if len(self.sentence_buffer) == len(sentence_words):
+                    sentence_response = self.brain.predict_response(" ".join(self.sentence_buffer))
+                    self.react(sentence_response, is_sentence=True)
+                    self.sentence_buffer.clear()
+                    if self.on_input_processed is not None:
+                        self.on_input_processed(" ".join(sentence_words), self.sentence_queue.last_enqueued_at)
 
-        self.tick += 1
-        self.state.update()
+            self.vibrations, _ = self.resonance.step(self.vibrations, now=self.clock.tick)
 
-        if self.input_queue:
-            current_input = self.input_queue.popleft()
-            self.last_signal = current_input
-            log_input(self.tick, current_input)
-            response = self.brain.predict_response(current_input)
-            self.react(response, is_sentence=False)
+            # Очереди разобраны — засыпаем: дальнейшее затухание досчитается при чтении
+            if not self.input_queue and not self.sentence_queue and not self.sentence_buffer:
+                self.is_resonating = False
 
-        if self.sentence_queue:
-            sentence_words = self.sentence_queue.popleft()
-            self.sentence_buffer.extend(sentence_words)
+            if self.introspector is not None:
+                self.introspector.on_tick(self.tick)
 
-            for word in sentence_words:
-                self.input_queue.append(word)
+            if self.checkpoint is not None:
+                self.checkpoint.on_tick(self.tick)
 
-            if len(self.sentence_buffer) == len(sentence_words):
-                sentence_response = self.brain.predict_response(" ".join(self.sentence_buffer))
-                self.react(sentence_response, is_sentence=True)
-                self.sentence_buffer.clear()
+            flush_tick(self.tick)
 
-        flush_tick(self.tick)
+    def _sentence_fits(self):
+        """
+        Фраза берётся из очереди, только когда её слова помещаются в очередь слов:
+        иначе поток фраз раздувал бы ограниченную очередь слов без предела.
+        Фраза длиннее ёмкости помещается только в пустую очередь.
+        """
+        words = self.sentence_queue.peek()
+        if words is None:
+            return False
+        return not self.input_queue or len(words) <= self.input_queue.free()
 
     @trace_method("VibrationalBeing")
     def _resonance_tick(self):
@@ -111,16 +208,17 @@ class VibrationalBeing:
         ch_name = vibration.chakra
         if ch_name in self.chakras:
             if not isinstance(self.chakras[ch_name], Chakra):
-                self.chakras[ch_name] = Chakra(ch_name)
+                self.chakras[ch_name] = Chakra(ch_name, clock=self.clock)
             self.chakras[ch_name].receive(vibration)
 
         self.memory.store(vibration)
+        self.state.feel(vibration, self.tick)
         self.brain.learn(self.last_signal, response)
         self.last_signal = response
 
         # 🧠 Сгенерировать отклик на основе вибрации
         response_data = self.generate_response(vibration)
-        log_message(self.tick, response=response_data)
+        log_message(self.tick, response=response_data, mood=self.state.mood)
 
         if is_sentence:
             print(f"Ответ на предложение: {response}")
@@ -138,7 +236,8 @@ class VibrationalBeing:
             emotion=emo,
             chakra=ch,
             word=word,
-            source=source
+            source=source,
+            tick=self.clock.tick
         )
 
     @trace_method("VibrationalBeing.generate_response")
@@ -146,10 +245,14 @@ class VibrationalBeing:
         if not vibration:
             return {"word": "...", "emotion": "нейтрально"}
 
-        word = self.brain.predict_response(vibration.word) or "..."
+        # Один обход графа ассоциаций вместо цепочки поисков в словаре мозга;
+        # петли и неизвестные слова дают пустой обход — тогда обычный прогноз
+        chain = self.brain.walk(vibration.word, self.association_hops)
+        word = chain[0] if chain else (self.brain.predict_response(vibration.word) or "...")
 
         return {
             "word": word,
+            "chain": chain or [word],
             "emotion": vibration.emotion,
             "chakra": vibration.chakra,
             "intensity": vibration.intensity,
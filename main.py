@@ -1,15 +1,35 @@
+from core.startup import STARTUP
 import time
 import threading
 import os
 import json
 from core.vibrational_being import VibrationalBeing
-from core.config import TICKS_PER_SECOND
+from core.clock import WORLD_CLOCK
+from core.config import TICKS_PER_SECOND, BRAIN_SERVICE_ENABLED
+from core.progress import TrainingProgress
+
+STARTUP.mark("импорт модулей")
 
 def update_loop(being):
     while True:
+        WORLD_CLOCK.advance()
         being.update()
         time.sleep(1 / TICKS_PER_SECOND)
 
+def wait_idle(being):
+    """Ждём, пока существо разберёт очереди и уснёт (is_idle)."""
+    while not being.is_idle():
+        time.sleep(0.001)
+
+def pause_ticks(ticks):
+    """
+    Пауза в тиках мира. Спящее существо свои тики не считает,
+    поэтому паузу отмеряют общие часы.
+    """
+    target = WORLD_CLOCK.tick + ticks
+    while WORLD_CLOCK.tick < target:
+        time.sleep(0.001)
+
 def input_loop(being):
     while True:
         text = input("🗣️ Введите сигнал: ").strip()
@@ -26,9 +46,8 @@ def input_loop(being):
 
         # 🕊 1 дополнительный тик паузы, если это фраза
         if len(words) > 1:
-            pause_tick = being.tick
-            while being.tick == pause_tick:
-                time.sleep(0.001)
+            wait_idle(being)
+            pause_ticks(1)
 
 def training_loop(being, json_folder="json_database"):
     print("📘 Режим обучения активирован")
@@ -45,61 +64,100 @@ def training_loop(being, json_folder="json_database"):
             print("❌ Ошибка: Тики не начались.")
             return
 
-    # ⏭ Переход на следующий тик
-    last_tick = being.tick
-    while being.tick == last_tick:
-        time.sleep(0.01)
+    # ⏭ Ждём, пока существо переживёт активацию
+    wait_idle(being)
 
-    # 📂 Сбор всех концептов
-    files = [f for f in os.listdir(json_folder) if f.endswith(".json")]
-    concepts = []
+    # 📂 Файлы базы (в стабильном порядке, чтобы смещения были воспроизводимы)
+    files = sorted(f for f in os.listdir(json_folder) if f.endswith(".json"))
+    progress = TrainingProgress(before_checkpoint=being.brain.force_save)
 
-    for file in files:
-        path = os.path.join(json_folder, file)
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            for entry in data.values():
-                if "концепт" in entry:
-                    concepts.append(entry["концепт"])
+    try:
+        for file in files:
+            path = os.path.join(json_folder, file)
+            start_offset = progress.begin_file(path)
+            if start_offset is None:
+                continue
 
-    print(f"📨 Всего предложений: {len(concepts)}")
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
 
-    for phrase in concepts:
-        words = phrase.strip().split()
+            entries = list(data.values())
+            print(f"📨 {file}: {len(entries)} записей, продолжение с {start_offset}")
 
-        for word in words:
-            last_tick = being.tick
-            being.enqueue_input(word)
-            while being.tick == last_tick:
-                time.sleep(0.001)
+            for offset in range(start_offset, len(entries)):
+                entry = entries[offset]
+                if not isinstance(entry, dict) or "концепт" not in entry:
+                    progress.advance(path, offset)
+                    continue
 
-        # 🕊 2 тика между предложениями
-        pause_tick = being.tick
-        while being.tick == pause_tick:
-            time.sleep(0.001)
-        while being.tick == pause_tick + 1:
+                phrase = entry["концепт"]
+                if progress.is_duplicate(phrase):
+                    progress.skip_duplicate(path, offset)
+                    continue
+
+                train_phrase(being, phrase)
+                progress.mark_done(path, offset, phrase)
+
+            progress.finish_file(path)
+
+        print("✅ Обучение завершено.")
+    except KeyboardInterrupt:
+        print("⏸ Обучение прервано, прогресс сохранён.")
+    finally:
+        progress.checkpoint()
+        print(f"📊 {progress.report()}")
+
+def train_phrase(being, phrase):
+    words = phrase.strip().split()
+
+    for word in words:
+        last_tick = being.tick
+        being.enqueue_input(word)
+        while being.tick == last_tick:
             time.sleep(0.001)
 
-    print("✅ Обучение завершено.")
+    # 🕊 2 тика между предложениями
+    wait_idle(being)
+    pause_ticks(2)
 
 def main():
-    being = VibrationalBeing(base_archetype="poet")
+    brain = None
+    if BRAIN_SERVICE_ENABLED:
+        from core.brain_service import BrainClient
+        brain = BrainClient()
+
+    being = VibrationalBeing(base_archetype="poet", brain=brain)
+    STARTUP.mark("создание существа")
+    if being.checkpoint is not None and being.checkpoint.restore():
+        STARTUP.mark("восстановление существа")
+        print(f"💾 Существо восстановлено на тике {being.tick} "
+              f"за {being.checkpoint.restore_seconds * 1000:.1f} мс")
     print("🔮 Существо инициализировано.")
+    print(STARTUP.report(being.brain))
 
     print("\nВыберите режим:")
     print("1 — 💬 Чат с существом")
     print("2 — 📘 Обучение из базы (json_database)")
     mode = input("👉 Введите номер режима: ").strip()
 
-    if mode == "1":
-        threading.Thread(target=update_loop, args=(being,), daemon=True).start()
-        print("💬 Режим общения активирован.")
-        input_loop(being)
-    elif mode == "2":
-        threading.Thread(target=update_loop, args=(being,), daemon=True).start()
-        training_loop(being)
-    else:
-        print("❌ Неизвестный режим. Завершение.")
+    try:
+        if mode == "1":
+            threading.Thread(target=update_loop, args=(being,), daemon=True).start()
+            print("💬 Режим общения активирован.")
+            input_loop(being)
+        elif mode == "2":
+            threading.Thread(target=update_loop, args=(being,), daemon=True).start()
+            # Обучение пишет в мозг и сохраняет его — ждём полной загрузки
+            being.brain.wait_ready()
+            training_loop(being)
+        else:
+            print("❌ Неизвестный режим. Завершение.")
+    except (KeyboardInterrupt, EOFError):
+        print("\n👋 Завершение.")
+    finally:
+        if being.checkpoint is not None:
+            being.checkpoint.save(with_brain=True)
+            print(f"💾 Существо сохранено на тике {being.tick}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,283 @@
+"""
+Нагрузочный и длительный (soak) тест: гоняет одно или несколько существ
+с заданной частотой запросов и пишет машиночитаемый отчёт.
+
+    python soak.py --beings 4 --rate 50 --duration 3600 --report data/soak_report.json
+
+Производитель по порядку проигрывает целые фразы базы (концепты),
+вперемешку с отдельными словами (--word-ratio). Задержка считается от
+постановки в очередь до окончания отклика (react) — отдельно для слов
+и для предложений. В задержку слов входят и слова, которые существо
+само ставит в очередь, разбирая предложение. Отставание тика — насколько поздно начался тик
+относительно расписания TICKS_PER_SECOND.
+
+Лог и трассировка пишутся в папку мозгов теста, а не в LOG_PATH.
+Мозги сохраняются при каждом снятии метрик (между тиками существа),
+чтобы рост brain.db был виден по ходу теста.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from array import array
+from core.vibrational_being import VibrationalBeing
+from core.brain import Brain
+from core.clock import Clock
+from core import logger
+from core.config import TICKS_PER_SECOND
+
+SYNTH_WORDS = [
+    "я", "есмь", "любовь", "свет", "радость", "тишина", "сердце", "душа",
+    "мир", "путь", "вода", "огонь", "небо", "земля", "время", "сон",
+]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="🧪 Нагрузочный тест существ")
+    parser.add_argument("--beings", type=int, default=1, help="сколько существ запускать")
+    parser.add_argument("--rate", type=float, default=20.0, help="запросов (фраз или слов) в секунду на существо")
+    parser.add_argument("--duration", type=float, default=60.0, help="длительность, секунд")
+    parser.add_argument("--source", choices=["json", "synth"], default="synth", help="откуда брать фразы")
+    parser.add_argument("--word-ratio", type=float, default=0.3, help="доля запросов-одиночных слов вместо фраз (0..1)")
+    parser.add_argument("--json-folder", default="json_database", help="папка базы для --source json")
+    parser.add_argument("--tick-rate", type=float, default=TICKS_PER_SECOND, help="тиков в секунду")
+    parser.add_argument("--sample-every", type=float, default=5.0, help="интервал снятия метрик, секунд")
+    parser.add_argument("--brain-dir", help="папка для brain_N.db (по умолчанию временная)")
+    parser.add_argument("--report", default="data/soak_report.json", help="путь к JSON-отчёту")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+def load_phrases(source, json_folder, rng):
+    if source == "json":
+        phrases = []
+        for file in sorted(f for f in os.listdir(json_folder) if f.endswith(".json")):
+            with open(os.path.join(json_folder, file), "r", encoding="utf-8") as f:
+                for entry in json.load(f).values():
+                    if isinstance(entry, dict) and entry.get("концепт", "").strip():
+                        phrases.append(entry["концепт"])
+        if phrases:
+            return phrases
+        print("⚠️ В базе нет концептов, используются синтетические фразы")
+
+    # Зипфово распределение: немного частых слов и длинный хвост уникальных
+    def synth_word():
+        rank = int(rng.paretovariate(1.2))
+        return SYNTH_WORDS[rank % len(SYNTH_WORDS)] if rank < 50 else f"слово{rank}"
+
+    return [" ".join(synth_word() for _ in range(rng.randint(2, 6))) for _ in range(2000)]
+
+def percentiles(values, points=(50, 95, 99)):
+    if not values:
+        return {f"p{p}": None for p in points} | {"max": None}
+    ordered = sorted(values)
+    result = {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+    result["max"] = ordered[-1]
+    return result
+
+def rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+class SoakRun:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.brain_dir = args.brain_dir or tempfile.mkdtemp(prefix="soak_brain_")
+        os.makedirs(self.brain_dir, exist_ok=True)
+        self.log_path = os.path.join(self.brain_dir, "log_state.json")
+        logger.redirect(self.log_path, os.path.join(self.brain_dir, "trace.bin"))
+
+        self.beings = []
+        for i in range(args.beings):
+            brain = Brain(save_path=os.path.join(self.brain_dir, f"brain_{i}.db"), background_load=False)
+            being = VibrationalBeing(base_archetype="poet", brain=brain, clock=Clock())
+            being.on_input_processed = self._on_processed
+            self.beings.append(being)
+
+        self.phrases = load_phrases(args.source, args.json_folder, self.rng)
+        self.words = [word for phrase in self.phrases for word in phrase.split()]
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.latencies = array("d")
+        self.sentence_latencies = array("d")
+        self.tick_lags = array("d")
+        self.sent = 0
+        self.rejected = 0
+        self.processed = 0
+        self.sentences_processed = 0
+        self.samples = []
+
+    def _on_processed(self, signal, enqueued_at):
+        latency = (time.monotonic() - enqueued_at) * 1000
+        with self.lock:
+            if " " in signal:
+                self.sentence_latencies.append(latency)
+                self.sentences_processed += 1
+            else:
+                self.latencies.append(latency)
+                self.processed += 1
+
+    def tick_loop(self, being):
+        period = 1.0 / self.args.tick_rate
+        next_tick = time.monotonic()
+        while not self.stop.is_set():
+            now = time.monotonic()
+            if now < next_tick:
+                time.sleep(next_tick - now)
+                now = time.monotonic()
+            with self.lock:
+                self.tick_lags.append((now - next_tick) * 1000)
+            being.clock.advance()
+            being.update()
+            next_tick += period
+            # После долгой паузы не пытаемся «догнать» пропущенные тики пачкой
+            if time.monotonic() - next_tick > 1.0:
+                next_tick = time.monotonic()
+
+    def producer_loop(self, being, seed):
+        rng = random.Random(seed)
+        period = 1.0 / self.args.rate
+        # Фразы идут по порядку, у каждого существа — со своего места
+        position = rng.randrange(len(self.phrases))
+        next_send = time.monotonic()
+        while not self.stop.is_set():
+            delay = next_send - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if rng.random() < self.args.word_ratio:
+                request = rng.choice(self.words)
+            else:
+                request = self.phrases[position]
+                position = (position + 1) % len(self.phrases)
+            accepted = being.enqueue_input(request, timeout=period)
+            with self.lock:
+                self.sent += 1
+                if not accepted:
+                    self.rejected += 1
+            next_send += period
+
+    def save_brains(self):
+        for being in self.beings:
+            # Под tick_lock: learn() в потоке тиков не меняет память во время записи
+            with being.tick_lock:
+                being.brain.force_save()
+
+    def sample(self, started):
+        self.save_brains()
+        vibrations = sum(len(b.vibrations) for b in self.beings)
+        long_term = sum(len(b.memory.long_term) for b in self.beings)
+        brain_entries = sum(len(b.brain.memory) for b in self.beings)
+        with self.lock:
+            processed = self.processed
+            sentences = self.sentences_processed
+        log_ticks, log_lines = logger.buffered()
+        self.samples.append({
+            "t": round(time.monotonic() - started, 3),
+            "rss_bytes": rss_bytes(),
+            "brain_db_bytes": sum(file_size(b.brain.save_path) for b in self.beings),
+            "log_bytes": file_size(self.log_path),
+            "log_buffer_ticks": log_ticks,
+            "log_buffer_lines": log_lines,
+            "brain_entries": brain_entries,
+            "vibrations": vibrations,
+            "long_term": long_term,
+            "queue_depth": sum(len(b.input_queue) + len(b.sentence_queue) for b in self.beings),
+            "processed": processed,
+            "sentences_processed": sentences,
+            "moods": [b.state.mood for b in self.beings],
+        })
+
+    def run(self):
+        threads = []
+        for i, being in enumerate(self.beings):
+            threads.append(threading.Thread(target=self.tick_loop, args=(being,), daemon=True))
+            threads.append(threading.Thread(target=self.producer_loop, args=(being, self.args.seed + i), daemon=True))
+
+        started = time.monotonic()
+        self.sample(started)
+        # Отклики существ печатаются в stdout — на время теста глушим их
+        real_stdout = sys.stdout
+        with open(os.devnull, "w", encoding="utf-8") as devnull:
+            sys.stdout = devnull
+            try:
+                for t in threads:
+                    t.start()
+                deadline = started + self.args.duration
+                while time.monotonic() < deadline:
+                    time.sleep(min(self.args.sample_every, max(0.0, deadline - time.monotonic())))
+                    self.sample(started)
+            except KeyboardInterrupt:
+                pass
+            finally:
+                self.stop.set()
+                for t in threads:
+                    t.join(timeout=2)
+                sys.stdout = real_stdout
+
+        self.sample(started)
+        return self.report(time.monotonic() - started)
+
+    def report(self, elapsed):
+        first, last = self.samples[0], self.samples[-1]
+        hours = max(last["t"] - first["t"], 1e-9) / 3600
+        rss_growth = last["rss_bytes"] - first["rss_bytes"]
+        return {
+            "config": vars(self.args) | {"brain_dir": self.brain_dir},
+            "summary": {
+                "elapsed_seconds": round(elapsed, 3),
+                "sent": self.sent,
+                "processed": self.processed,
+                "sentences_processed": self.sentences_processed,
+                "rejected": self.rejected,
+                "throughput_per_second": round(self.processed / elapsed, 3) if elapsed else 0.0,
+                "latency_ms": percentiles(self.latencies),
+                "sentence_latency_ms": percentiles(self.sentence_latencies),
+                "tick_lag_ms": percentiles(self.tick_lags),
+                "rss_growth_bytes": rss_growth,
+                "rss_growth_mb_per_hour": round(rss_growth / 1024 / 1024 / hours, 3),
+                "brain_db_growth_bytes": last["brain_db_bytes"] - first["brain_db_bytes"],
+                "log_growth_bytes": last["log_bytes"] - first["log_bytes"],
+                "log_buffer_lines": last["log_buffer_lines"],
+                "vibrations_growth": last["vibrations"] - first["vibrations"],
+                "long_term_growth": last["long_term"] - first["long_term"],
+                "queues": [b.queue_stats() for b in self.beings],
+            },
+            "samples": self.samples,
+        }
+
+def main(argv=None):
+    args = parse_args(argv)
+    run = SoakRun(args)
+    print(f"🧪 {args.beings} существ × {args.rate} запросов/с, {args.duration} с, мозги в {run.brain_dir}")
+    report = run.run()
+
+    directory = os.path.dirname(args.report)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    s = report["summary"]
+    lat, sent_lat, lag = s["latency_ms"], s["sentence_latency_ms"], s["tick_lag_ms"]
+    print(f"📨 отправлено {s['sent']}, обработано слов {s['processed']}, "
+          f"предложений {s['sentences_processed']}, отклонено {s['rejected']}")
+    print(f"⏱️ задержка слов, мс: p50={lat['p50']} p95={lat['p95']} p99={lat['p99']}")
+    print(f"⏱️ задержка предложений, мс: p50={sent_lat['p50']} p95={sent_lat['p95']} p99={sent_lat['p99']}")
+    print(f"🐢 отставание тика, мс: p50={lag['p50']} p95={lag['p95']} p99={lag['p99']}")
+    print(f"🧠 RSS: {s['rss_growth_bytes'] / 1024 / 1024:+.1f} МБ ({s['rss_growth_mb_per_hour']:+.1f} МБ/ч), "
+          f"brain.db: {s['brain_db_growth_bytes']:+d} байт, вибраций: {s['vibrations_growth']:+d}, "
+          f"долговременная память: {s['long_term_growth']:+d}")
+    print(f"📄 Отчёт: {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import sys
+import argparse
+from core.config import TRACE_STORE_PATH
+from core.trace_store import TraceReader, format_record
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="🔎 Поиск по бинарной трассировке существа")
+    parser.add_argument("path", nargs="?", default=TRACE_STORE_PATH, help="файл трассировки")
+    parser.add_argument("--from", dest="start", type=int, help="первый тик (включительно)")
+    parser.add_argument("--to", dest="end", type=int, help="последний тик (включительно)")
+    parser.add_argument("--class", dest="class_name", help="фильтр по классу, например Brain")
+    parser.add_argument("--method", help="фильтр по методу, например learn")
+    parser.add_argument("--limit", type=int, help="максимум выводимых записей")
+    parser.add_argument("--output", help="записать результат в файл вместо stdout")
+    parser.add_argument("--stats", action="store_true", help="только сводка по индексу")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    reader = TraceReader(args.path)
+
+    if args.stats:
+        blocks = len(reader.offsets)
+        print(f"📦 Блоков: {blocks}, записей: {len(reader)}")
+        if blocks:
+            print(f"⏳ Тики: {min(reader.first_ticks)}…{max(reader.last_ticks)}")
+            print(f"📈 Тики по возрастанию: {'да' if reader.monotonic else 'нет'}")
+        return
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        records = reader.records(args.start, args.end, args.class_name, args.method)
+        for n, record in enumerate(records):
+            if args.limit is not None and n >= args.limit:
+                break
+            out.write(format_record(record) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()